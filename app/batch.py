@@ -0,0 +1,137 @@
+# Scoring par lots de catalogues NDJSON, avec une mémoire bornée
+import heapq
+import logging
+import os
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, Iterator, Optional
+
+import orjson
+from fastapi import HTTPException, Request
+
+from app.inference import inference_executor
+from app.schemas import validate_movies
+from app.serialization import dump_line, prediction_records
+
+
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", 1000))     # films prédits par appel au modèle
+BATCH_MAX_TOP_K = int(os.getenv("BATCH_MAX_TOP_K", 10000))      # top_k maximal : films gardés en mémoire
+SPOOL_MAX_SIZE = 1024 * 1024    # au-delà, le corps de la requête est écrit sur disque
+
+logger = logging.getLogger(__name__)
+
+
+async def spool_request_body(request: Request) -> BinaryIO:
+    """
+    Copie le corps de la requête dans un fichier temporaire, sur disque au-delà de SPOOL_MAX_SIZE.
+
+    Args:
+        request (Request): Requête contenant le catalogue NDJSON.
+
+    Returns:
+        BinaryIO: Fichier positionné au début, à fermer par l'appelant.
+
+    Note:
+        Le corps est lu entièrement avant de répondre : la réponse en flux ne peut pas
+        lire la requête pendant qu'elle écrit.
+    """
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    async for data in request.stream():
+        spool.write(data)
+    spool.seek(0)
+    return spool
+
+
+def iter_ndjson_chunks(file: BinaryIO, chunk_size: int) -> Iterator[list[dict]]:
+    """
+    Lit un fichier NDJSON par paquets de chunk_size films.
+
+    Args:
+        file (BinaryIO): Fichier NDJSON (un objet JSON par ligne, lignes vides ignorées).
+        chunk_size (int): Nombre maximal de films par paquet.
+
+    Yields:
+        list[dict]: Paquet de films.
+
+    Raises:
+        ValueError: Si une ligne n'est pas un objet JSON valide.
+    """
+    chunk = []
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            movie = orjson.loads(line)
+        except ValueError:
+            raise ValueError(f"Ligne {line_number} : JSON invalide")
+        if not isinstance(movie, dict):
+            raise ValueError(f"Ligne {line_number} : un objet JSON est attendu")
+        chunk.append(movie)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def stream_predictions(file: BinaryIO, chunk_size: int = BATCH_CHUNK_SIZE, top_k: Optional[int] = None,
+                             fields: Optional[tuple[str, ...]] = None) -> AsyncIterator[bytes]:
+    """
+    Prédit un catalogue NDJSON paquet par paquet et renvoie les résultats en NDJSON.
+
+    Args:
+        file (BinaryIO): Catalogue NDJSON, fermé à la fin du flux.
+        chunk_size (int): Nombre de films prédits par appel au modèle.
+        top_k (int, optional): Si renseigné, seuls les top_k films les mieux prédits sont
+            renvoyés, par prédiction décroissante ; sinon tous les films dans l'ordre d'entrée.
+        fields (tuple[str, ...], optional): Champs des films à renvoyer avec 'prediction' (tous par défaut).
+
+    Yields:
+        bytes: Une ligne NDJSON par film.
+
+    Note:
+        - La mémoire reste bornée par chunk_size (ou top_k, au plus BATCH_MAX_TOP_K) quelle que soit la taille du catalogue
+        - Le top_k est maintenu dans un tas de taille top_k, sans tri complet
+        - Les paquets passent par le pool de calcul et attendent leur tour une fois le lot accepté
+        - Un film invalide donne une ligne {"index": ..., "errors": [...]} (index : rang du film
+          dans le catalogue) et n'interrompt pas le flux
+        - En cas d'erreur de lecture ou de calcul, une ligne {"error": ...} termine le flux
+    """
+    from app.use_model import predict_movies
+
+    heap = []   # (prédiction, -rang, film) : à prédiction égale, le premier film reçu l'emporte
+    rank = 0
+    offset = 0  # rang du premier film du paquet dans le catalogue
+    try:
+        for chunk in iter_ndjson_chunks(file, chunk_size):
+            movies, valid, errors = validate_movies(chunk)
+            for error in errors:
+                yield dump_line({**error, "index": offset + error["index"]})
+            offset += len(chunk)
+            if not movies:
+                continue
+            valid_chunk = chunk if len(valid) == len(chunk) else [chunk[i] for i in valid]
+            predictions = await inference_executor.run(predict_movies, movies, reject=False)
+            scored = prediction_records(valid_chunk, predictions, fields)
+            if top_k is None:
+                yield b"".join(dump_line(record) for record in scored)
+                continue
+            for record in scored:
+                item = (record['prediction'], -rank, record)
+                rank += 1
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+        for _, _, record in sorted(heap, key=lambda item: item[:2], reverse=True):
+            yield dump_line(record)
+    except KeyError as e:
+        yield dump_line({"error": f"Colonne manquante : {e}"})
+    except ValueError as e:
+        yield dump_line({"error": str(e)})
+    except HTTPException as e:
+        yield dump_line({"error": e.detail})
+    except Exception as e:  # erreur du modèle ou du pool : les en-têtes 200 sont déjà partis
+        logger.exception("Scoring par lots interrompu")
+        yield dump_line({"error": f"Erreur interne : {type(e).__name__}"})
+    finally:
+        file.close()
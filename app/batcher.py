@@ -0,0 +1,115 @@
+# Micro-batching : regroupe les requêtes de prédiction concurrentes en un seul appel au modèle
+import asyncio
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.inference import InferenceExecutor, inference_executor
+from app.metrics import Histogram
+from app.schemas import MovieInput
+from app.use_model import predict_movies
+
+
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 5))     # attente maximale avant envoi d'un lot
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", 512))           # envoi immédiat au-delà de ce nombre de films
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+QUEUE_DELAY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class MicroBatcher:
+    """
+    Collecte les films des requêtes concurrentes pendant max_wait_ms (ou jusqu'à max_rows films),
+    les prédit en un seul appel puis renvoie à chaque appelant ses propres prédictions.
+
+    Note:
+        - Tout se passe sur la boucle d'événements : pas de verrou nécessaire
+        - Plusieurs lots peuvent être en cours de calcul, la limite est celle du pool d'inférence
+        - Une erreur de calcul est transmise à toutes les requêtes du lot
+    """
+
+    def __init__(self, executor: InferenceExecutor = inference_executor,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS, max_rows: int = MICROBATCH_MAX_ROWS):
+        self.executor = executor
+        self.max_wait = max_wait_ms / 1000
+        self.max_rows = max_rows
+        self._pending: list[tuple[list[MovieInput], asyncio.Future, float]] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()     # référence forte sur les lots en cours
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.request_sizes = Histogram(BATCH_SIZE_BUCKETS)     # films par requête, avant regroupement
+        self.queue_delays_ms = Histogram(QUEUE_DELAY_BUCKETS_MS)
+        self.requests = 0
+
+    async def submit(self, new_movies: list[MovieInput]) -> np.ndarray:
+        """
+        Ajoute des films au prochain lot et attend leurs prédictions.
+
+        Args:
+            new_movies (list[MovieInput]): Films validés d'une requête.
+
+        Returns:
+            np.ndarray: Prédictions, dans l'ordre de new_movies.
+
+        Raises:
+            HTTPException: 503 si le pool d'inférence est saturé, 504 si le lot dépasse le délai.
+        """
+        if not new_movies:
+            return np.empty(0)
+        self.executor.check_capacity()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((new_movies, future, time.perf_counter()))
+        self._pending_rows += len(new_movies)
+        self.requests += 1
+        self.request_sizes.observe(len(new_movies))
+        if self._pending_rows >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "request_size": self.request_sizes.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_delay_ms": self.queue_delays_ms.snapshot(),
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[list[MovieInput], asyncio.Future, float]]) -> None:
+        now = time.perf_counter()
+        records = []
+        for new_movies, _, enqueued_at in batch:
+            records.extend(new_movies)
+            self.queue_delays_ms.observe((now - enqueued_at) * 1000)
+        self.batch_sizes.observe(len(records))
+        try:
+            predictions = await self.executor.run(predict_movies, records, reject=False)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        start = 0
+        for new_movies, future, _ in batch:
+            end = start + len(new_movies)
+            if not future.done():   # requête abandonnée par le client
+                future.set_result(predictions[start:end])
+            start = end
+
+
+prediction_batcher = MicroBatcher()
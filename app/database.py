@@ -1,21 +1,154 @@
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 from sqlmodel import SQLModel, create_engine, Session
 from dotenv import load_dotenv, find_dotenv
-import os
+from app.metrics import Histogram
 from app.modeles import Users
 
 
 dotenv_path = find_dotenv()
-load_dotenv(dotenv_path=dotenv_path)
+load_dotenv(dotenv_path=dotenv_path, override=True)     # .env lu une seule fois, pour toute l'application
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./api_users.db")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))                # connexions gardées ouvertes
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))         # connexions supplémentaires en pic
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))       # attente maximale d'une connexion (s)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))       # renouvellement des connexions (s), avant le wait_timeout MySQL
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+CHECKOUT_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """
+    Temps d'attente des connexions et nombre d'échecs (délai dépassé) du pool.
+    """
+
+    def __init__(self):
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_BUCKETS_MS)
+        self.checkout_timeouts = 0
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool qui mesure le temps d'obtention de chaque connexion.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:        # pool saturé ; les erreurs de connexion ne sont pas comptées
+            pool_metrics.checkout_timeouts += 1
+            raise
+        finally:
+            pool_metrics.checkout_wait_ms.observe((time.perf_counter() - start) * 1000)
+
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./api_users.db") 
+def _enable_sqlite_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")       # lectures concurrentes pendant une écriture
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
 
-engine = create_engine(DATABASE_URL)
 
-SQLModel.metadata.create_all(engine)
+def build_engine(url: str = DATABASE_URL) -> Engine:
+    """
+    Crée le moteur SQLAlchemy avec un pool de connexions adapté au type de base.
+
+    Args:
+        url (str): URL de connexion (sqlite, postgresql, mysql, mssql...).
+
+    Returns:
+        Engine: Moteur configuré.
+
+    Note:
+        - SQLite en mémoire : une connexion unique partagée (StaticPool), sinon chaque thread
+          (tâches de fond comprises) verrait une base vide
+        - SQLite (local) : journal WAL, connexions partageables entre threads, pas de pre-ping
+        - Autres bases : taille du pool, débordement, pre-ping et recyclage selon les variables DB_POOL_*
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        if make_url(url).database in (None, "", ":memory:"):     # une seule connexion : même base pour tous les threads
+            return create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+        engine = create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            connect_args={"check_same_thread": False},
+        )
+        event.listen(engine, "connect", _enable_sqlite_wal)
+        return engine
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+engine = build_engine()
+_db_initialized = False
+
+
+def init_db():
+    """
+    Crée les tables manquantes (appelé au démarrage de l'application et par create_admin.py).
+
+    Note:
+        Sans effet si les tables ont déjà été créées par ce processus ou par son parent
+        (mode pré-forké) : les workers ne se concurrencent pas sur le CREATE TABLE.
+    """
+    global _db_initialized
+    if not _db_initialized:
+        SQLModel.metadata.create_all(engine)
+        _db_initialized = True
+
+
+def pool_stats() -> dict:
+    """
+    Retourne l'état du pool de connexions et les temps d'attente observés.
+
+    Returns:
+        dict: Taille, connexions utilisées, débordement, taux de saturation et histogramme d'attente (ms).
+    """
+    pool = engine.pool
+    stats = {"pool": pool.status()}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + DB_MAX_OVERFLOW
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "capacity": capacity,
+            "saturation": pool.checkedout() / capacity if capacity else 0.0,
+        })
+    stats["checkout_wait_ms"] = pool_metrics.checkout_wait_ms.snapshot()
+    stats["checkout_timeouts"] = pool_metrics.checkout_timeouts
+    return stats
 
 def db_connection():
     """
     Génère une session de base de données pour FastAPI
+
+    Note:
+        La session n'emprunte une connexion au pool qu'à la première requête SQL :
+        les routes qui ne l'utilisent pas (utilisateur déjà en cache) ne consomment pas de connexion.
     """
     session = Session(engine)  # Ouvre une session SQLModel
     try:
@@ -0,0 +1,167 @@
+# Jeu de données historique au format colonnaire (NumPy mappé en mémoire)
+#
+# Construction : python -m app.dataset [chemin_json] [dossier_sortie]
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DATASET_PATH = os.getenv("DATASET_PATH", "app/DATASET_FINAL.json")
+DATASET_ARTIFACT_DIR = os.getenv("DATASET_ARTIFACT_DIR", "app/dataset")
+
+TALENT_COLUMNS = ("actor_1", "actor_2", "actor_3", "directors", "writer", "distribution")
+
+MANIFEST_FILE = "manifest.json"
+CATEGORIES_FILE = "categories.json"
+ENTRANCES_FILE = "weekly_entrances.npy"
+
+
+@dataclass(frozen=True)
+class ColumnarDataset:
+    """
+    Colonnes du jeu de données utiles au calcul des niveaux de talents.
+
+    Attributes:
+        version (str): Empreinte SHA-256 (tronquée) du fichier JSON d'origine.
+        entrances (np.ndarray): Entrées hebdomadaires (int64), une valeur par film.
+        codes (Mapping[str, np.ndarray]): Code (int32) du nom de chaque film par colonne, -1 si absent.
+        categories (Mapping[str, list[str]]): Dictionnaire code -> nom par colonne.
+        source (str): Fichier ou dossier d'où proviennent les colonnes.
+    """
+    version: str
+    entrances: np.ndarray
+    codes: Mapping[str, np.ndarray]
+    categories: Mapping[str, list]
+    source: str
+
+
+def file_checksum(path: str) -> str:
+    """
+    Retourne l'empreinte SHA-256 (tronquée à 12 caractères) d'un fichier.
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def read_json_dataset(path: str = DATASET_PATH) -> ColumnarDataset:
+    """
+    Lit le jeu de données JSON et le convertit en colonnes codées.
+
+    Args:
+        path (str): Chemin de DATASET_FINAL.json.
+
+    Returns:
+        ColumnarDataset: Colonnes en mémoire (non mappées).
+    """
+    df = pd.read_json(path)
+    codes, categories = {}, {}
+    for column in TALENT_COLUMNS:
+        column_codes, uniques = pd.factorize(df[column])
+        codes[column] = column_codes.astype(np.int32)
+        categories[column] = uniques.tolist()
+    return ColumnarDataset(
+        version=file_checksum(path),
+        entrances=df['weekly_entrances'].to_numpy(dtype=np.int64),
+        codes=codes,
+        categories=categories,
+        source=path,
+    )
+
+
+def _save(path: str, write) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)  # remplacement atomique : les processus qui mappent l'ancien fichier le gardent
+
+
+def build_dataset_artifact(path: str = DATASET_PATH, artifact_dir: str = DATASET_ARTIFACT_DIR) -> ColumnarDataset:
+    """
+    Convertit DATASET_FINAL.json en fichiers .npy et dictionnaires de noms.
+
+    Args:
+        path (str): Chemin du fichier JSON.
+        artifact_dir (str): Dossier de sortie.
+
+    Returns:
+        ColumnarDataset: Colonnes écrites.
+
+    Note:
+        Le manifeste est écrit en dernier : un dossier sans manifeste à jour est ignoré au chargement.
+    """
+    dataset = read_json_dataset(path)
+    os.makedirs(artifact_dir, exist_ok=True)
+    _save(os.path.join(artifact_dir, ENTRANCES_FILE), lambda f: np.save(f, dataset.entrances))
+    for column in TALENT_COLUMNS:
+        _save(os.path.join(artifact_dir, f"{column}.npy"), lambda f, c=column: np.save(f, dataset.codes[c]))
+    _save(os.path.join(artifact_dir, CATEGORIES_FILE),
+          lambda f: f.write(json.dumps(dataset.categories, ensure_ascii=False).encode()))
+    manifest = {"version": dataset.version, "rows": int(len(dataset.entrances)), "columns": list(TALENT_COLUMNS)}
+    _save(os.path.join(artifact_dir, MANIFEST_FILE), lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return dataset
+
+
+def load_dataset_artifact(artifact_dir: str = DATASET_ARTIFACT_DIR, expected_version: Optional[str] = None) -> Optional[ColumnarDataset]:
+    """
+    Charge les colonnes construites par build_dataset_artifact, mappées en mémoire.
+
+    Args:
+        artifact_dir (str): Dossier des fichiers .npy.
+        expected_version (str, optional): Version attendue du JSON d'origine.
+
+    Returns:
+        ColumnarDataset | None: Colonnes mappées, ou None si le dossier est absent ou périmé.
+
+    Note:
+        Les tableaux sont ouverts avec mmap_mode='r' : plusieurs workers partagent
+        les mêmes pages du cache système au lieu de garder chacun une copie.
+    """
+    manifest_path = os.path.join(artifact_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if expected_version is not None and manifest["version"] != expected_version:
+        return None
+    with open(os.path.join(artifact_dir, CATEGORIES_FILE), encoding="utf-8") as f:
+        categories = json.load(f)
+    return ColumnarDataset(
+        version=manifest["version"],
+        entrances=np.load(os.path.join(artifact_dir, ENTRANCES_FILE), mmap_mode='r'),
+        codes={column: np.load(os.path.join(artifact_dir, f"{column}.npy"), mmap_mode='r') for column in TALENT_COLUMNS},
+        categories=categories,
+        source=artifact_dir,
+    )
+
+
+def load_dataset(path: str = DATASET_PATH, artifact_dir: str = DATASET_ARTIFACT_DIR) -> ColumnarDataset:
+    """
+    Charge le jeu de données depuis l'artefact colonnaire s'il est à jour, sinon depuis le JSON.
+
+    Args:
+        path (str): Chemin de DATASET_FINAL.json (référence de version).
+        artifact_dir (str): Dossier de l'artefact colonnaire.
+
+    Returns:
+        ColumnarDataset: Colonnes du jeu de données.
+    """
+    version = file_checksum(path) if os.path.exists(path) else None
+    dataset = load_dataset_artifact(artifact_dir, expected_version=version)
+    if dataset is None:
+        dataset = read_json_dataset(path)
+    return dataset
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construit l'artefact colonnaire de DATASET_FINAL.json")
+    parser.add_argument("path", nargs="?", default=DATASET_PATH, help="fichier JSON d'origine")
+    parser.add_argument("artifact_dir", nargs="?", default=DATASET_ARTIFACT_DIR, help="dossier de sortie")
+    args = parser.parse_args()
+    dataset = build_dataset_artifact(args.path, args.artifact_dir)
+    print(f"✅ {len(dataset.entrances)} films écrits dans {args.artifact_dir} (version {dataset.version})")
@@ -1,14 +1,17 @@
 
 # Routes admin
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from app.schemas import CreateUserRequest
-from app.utils import db_dependency, bcrypt_context, get_current_user
+from app.utils import db_dependency, bcrypt_context, get_current_user, invalidate_user_cache, require_admin
 from app.modeles import Users
+from app.model_registry import model_registry
+from app.database import pool_stats
 from sqlalchemy import text
-from typing import Annotated
+from typing import Annotated, Any
 
 
-router = APIRouter()  # pour les routes d'administration
+router = APIRouter(dependencies=[Depends(require_admin)])  # pour les routes d'administration, réservées aux administrateurs
 
 
 @router.get("/users")   # Obtenir la liste des utilisateurs
@@ -69,5 +72,123 @@ async def create_user(create_user_request: CreateUserRequest, db: db_dependency,
             )
         db.add(create_user_model)
         db.commit()
+        invalidate_user_cache(create_user_request.email)
         return {"message": f"Utilisateur {create_user_request.username} créé"}
-    
\ No newline at end of file
+
+
+@router.get("/model")  # Version du modèle en service
+async def get_model():
+    """
+    Retourne la version du modèle actuellement chargé.
+
+    Returns:
+        dict: Version (empreinte SHA-256), chemin et date de chargement du modèle.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    return model_registry.current.info()
+
+
+@router.post("/model/reload")  # Recharger le modèle à chaud
+async def reload_model():
+    """
+    Recharge le modèle si le fichier a changé sur disque.
+
+    Returns:
+        dict: Indique si un nouveau modèle a été publié, avec sa version.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+
+    Note:
+        - Le nouveau modèle est préchauffé avant d'être publié
+        - Les requêtes en cours terminent avec l'ancien modèle
+    """
+    reloaded = await run_in_threadpool(model_registry.reload_if_changed)
+    return {"reloaded": reloaded, **model_registry.current.info()}
+
+
+@router.post("/box-office")  # Ajouter des résultats hebdomadaires aux niveaux des talents
+async def add_box_office(rows: list[dict[str, Any]]):
+    """
+    Ajoute des résultats au box-office et reclasse les talents concernés.
+
+    Args:
+        rows (list[dict]): Résultats hebdomadaires (weekly_entrances, fr_title, actor_1..3, directors, writer, distribution).
+
+    Returns:
+        dict: Nombre de résultats ajoutés, lignes rejetées, génération des tables et noms ayant changé de niveau.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+
+    Note:
+        - Les lignes invalides sont rejetées une à une, les autres sont ajoutées
+        - Les autres workers appliquent les nouveaux résultats avant leur prochaine prédiction (voir refresh_from_log)
+        - Les prédictions en cache des tables précédentes ne sont plus servies
+    """
+    from app.feature_store import ingest_box_office
+    return await run_in_threadpool(ingest_box_office, rows)
+
+
+@router.get("/batcher")  # Statistiques du micro-batching
+async def get_batcher_stats():
+    """
+    Retourne les statistiques du regroupement des requêtes de prédiction.
+
+    Returns:
+        dict: Nombre de requêtes, histogrammes de la taille des lots et du délai d'attente (ms).
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    from app.batcher import prediction_batcher
+    return prediction_batcher.stats()
+
+
+@router.get("/cache")  # Statistiques du cache de prédictions
+async def get_cache_stats():
+    """
+    Retourne l'état du cache de prédictions.
+
+    Returns:
+        dict: Taille, capacité, durée de vie, succès / échecs et génération courante du cache.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    from app.prediction_cache import prediction_cache
+    return prediction_cache.stats()
+
+
+@router.delete("/cache")  # Vider les caches de prédictions et d'explications
+async def clear_cache():
+    """
+    Vide les caches de prédictions et d'explications.
+
+    Returns:
+        dict: Message de confirmation.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    from app.explain import explanation_cache
+    from app.prediction_cache import prediction_cache
+    prediction_cache.clear()
+    explanation_cache.clear()
+    return {"message": "Caches de prédictions et d'explications vidés"}
+
+
+@router.get("/db")  # État du pool de connexions
+async def get_db_stats():
+    """
+    Retourne l'état du pool de connexions à la base de données.
+
+    Returns:
+        dict: Connexions utilisées, saturation et histogramme des temps d'attente (ms).
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    return pool_stats()
@@ -1,9 +1,9 @@
 # Routes auth
-from fastapi import APIRouter, FastAPI, Depends, HTTPException, status
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import text
 from typing import Annotated
-from app.utils import db_dependency, get_current_user, create_access_token, get_password_hash, authenticate_user
+from app.utils import db_dependency, get_current_user, create_access_token, get_password_hash, authenticate_user, login_executor, login_limiter
 from app.modeles import Users
 # from app.schemas import NewPassword
 
@@ -17,11 +17,12 @@ router = APIRouter()
 ############################
 
 @router.post("/login")    # pour récupérer le token d'accès
-def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency) :
+async def login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency) :
     """
     Authentifie un utilisateur et génère un token JWT d'accès.
 
     Args:
+        request (Request): Requête HTTP, pour l'adresse IP du client.
         form_data (OAuth2PasswordRequestForm): Formulaire contenant username (email) et password.
         db (Session): Session de base de données SQLAlchemy.
 
@@ -33,12 +34,18 @@ def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dep
         HTTPException:
             - 401: Si les identifiants sont incorrects
             - 404: Si l'utilisateur n'existe pas
+            - 429: Si l'utilisateur ou l'adresse IP a trop d'échecs récents
+            - 503: Si le pool de vérification des mots de passe est saturé
 
     Note:
-        Le token généré contient l'email, le nom de la banque et le rôle de l'utilisateur
+        - Le token généré contient l'email, le nom de la banque et le rôle de l'utilisateur
+        - La vérification bcrypt s'exécute dans un pool dédié (LOGIN_WORKERS threads)
     """
-    user = authenticate_user(username=form_data.username, password=form_data.password, db=db)
+    client_ip = request.client.host if request.client else "inconnue"
+    login_limiter.check(form_data.username, client_ip)
+    user = await login_executor.run(authenticate_user, form_data.username, form_data.password, db)
     if not user : 
+        login_limiter.record_failure(form_data.username, client_ip)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Nom d'utilisateur ou mot de passe incorrect, veuillez corriger votre saisie", headers={"WWW-Authenticate": "Bearer"})
     token_data = {
         "sub": user.email,
@@ -47,5 +54,6 @@ def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dep
                 
         }
     }
+    login_limiter.record_success(form_data.username)
     acces_token = create_access_token(data=token_data)
     return {"access_token": acces_token, "token_type": "bearer"}
@@ -0,0 +1,84 @@
+# POST /jobs : Pour soumettre un catalogue complet à prédire en arrière-plan.
+# GET /jobs/{job_id} : Pour suivre l'avancement d'une tâche.
+# GET /jobs/{job_id}/result : Pour télécharger les prédictions d'une tâche terminée.
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from typing import Annotated
+from app.batch import BATCH_CHUNK_SIZE
+from app.jobs import get_job, job_to_dict, result_path, submit_job
+from app.modeles import Users
+from app.utils import get_current_user
+
+router = APIRouter()
+
+
+def _owner_filter(user: Users):
+    return None if user.is_admin else user.id   # un administrateur voit toutes les tâches
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    request: Request,
+    current_user: Annotated[Users, Depends(get_current_user)],
+    chunk_size: Annotated[int, Query(ge=1, le=10000, description="Films prédits par appel au modèle")] = BATCH_CHUNK_SIZE,
+):
+    """
+    Soumet un catalogue NDJSON (un film par ligne) à prédire en arrière-plan.
+
+    Args:
+        request (Request): Requête dont le corps est le catalogue NDJSON.
+        current_user (Users): Utilisateur actuellement authentifié.
+        chunk_size (int): Taille des paquets envoyés au modèle.
+
+    Returns:
+        dict: Tâche créée (identifiant, statut "pending", nombre de films).
+
+    Note:
+        La requête se termine dès le catalogue enregistré ; suivre ensuite GET /jobs/{job_id}.
+    """
+    job = await submit_job(request, chunk_size, current_user.id)
+    return job_to_dict(job)
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str, current_user: Annotated[Users, Depends(get_current_user)]):
+    """
+    Retourne l'état et l'avancement d'une tâche.
+
+    Args:
+        job_id (str): Identifiant renvoyé par POST /jobs.
+        current_user (Users): Utilisateur actuellement authentifié.
+
+    Returns:
+        dict: Statut (pending, running, done, failed), films traités et rejetés, erreur éventuelle.
+
+    Raises:
+        HTTPException: 404 si la tâche n'existe pas ou appartient à un autre utilisateur.
+    """
+    job = await run_in_threadpool(get_job, job_id, _owner_filter(current_user))
+    return job_to_dict(job)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, current_user: Annotated[Users, Depends(get_current_user)]):
+    """
+    Télécharge les prédictions d'une tâche terminée.
+
+    Args:
+        job_id (str): Identifiant renvoyé par POST /jobs.
+        current_user (Users): Utilisateur actuellement authentifié.
+
+    Returns:
+        FileResponse: Fichier NDJSON compressé (gzip), une ligne par film dans l'ordre du catalogue.
+
+    Raises:
+        HTTPException:
+            - 404: Si la tâche n'existe pas ou appartient à un autre utilisateur
+            - 409: Si la tâche n'est pas terminée
+    """
+    job = await run_in_threadpool(get_job, job_id, _owner_filter(current_user))
+    if job.status != "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Tâche non terminée ({job.status})")
+    return FileResponse(result_path(job_id), media_type="application/gzip", filename=f"{job_id}.ndjson.gz")
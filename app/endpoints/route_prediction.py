@@ -3,15 +3,178 @@
 # GET /predictions/{film_id} : Pour récupérer les détails d'une prédiction spécifique.
 # GET /predictions/top : Pour obtenir les films avec les meilleures prédictions pour la semaine.
 
-from fastapi import APIRouter, Depends
-from typing import Annotated
-from ..use_model import use_model
-from app.utils import get_current_user
+from datetime import date
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from typing import Annotated, Optional
+from app.batch import BATCH_CHUNK_SIZE, BATCH_MAX_TOP_K, spool_request_body, stream_predictions
+from app.inference import inference_executor
+from app.model_registry import model_registry
+from app.prediction_history import (
+    PREDICTION_HISTORY_ENABLED,
+    film_key,
+    film_predictions,
+    list_predictions,
+    persist_predictions,
+    week_of,
+    weekly_top,
+)
+from app.schemas import validate_movies
+from app.serialization import json_response, ndjson_response, parse_fields, prediction_records
+from app.utils import db_dependency, get_current_user
 
 router = APIRouter()
 
 
 @router.post("/predictions")
-def get_predictions(data: list[dict],current_user: Annotated[str, Depends(get_current_user)]):
-    return {"result" : use_model(data)}
+async def get_predictions(
+    request: Request,
+    data: list[dict],
+    current_user: Annotated[str, Depends(get_current_user)],
+    background_tasks: BackgroundTasks,
+    explain: Annotated[bool, Query(description="Ajouter les contributions SHAP de chaque variable")] = False,
+    fields: Annotated[Optional[str], Query(description="Champs des films à renvoyer, séparés par des virgules")] = None,
+):
+    """
+    Prédit la fréquentation d'une liste de films et renvoie les 10 meilleurs.
 
+    Args:
+        request (Request): Requête HTTP, pour la compression de la réponse (Accept-Encoding).
+        data (list[dict]): Films à prédire (champs de MovieInput, champs supplémentaires renvoyés tels quels).
+        current_user (Users): Utilisateur actuellement authentifié.
+        background_tasks (BackgroundTasks): Enregistrement de l'historique après la réponse.
+        explain (bool): Expliquer chaque film renvoyé (valeur de base et contribution de chaque variable).
+        fields (str, optional): Champs des films à renvoyer (tous par défaut) ; 'prediction' et 'film_key'
+            sont toujours renvoyés.
+
+    Returns:
+        Response: JSON (sérialisé par orjson, compressé en brotli ou gzip si le client l'accepte) :
+            - result: Films valides les mieux prédits, complétés de 'prediction' et 'film_key'
+              (et de 'explanation' avec explain)
+            - errors: Films rejetés, avec leur position dans data et le détail des champs invalides
+
+    Note:
+        Les explications ne sont calculées que pour les films renvoyés, dans un pool séparé
+        (EXPLAIN_WORKERS) : les requêtes sans explain n'attendent jamais ce calcul.
+    """
+    from app.batcher import prediction_batcher
+    from app.use_model import top_indices
+
+    movies, valid, errors = validate_movies(data)
+    model_version = model_registry.current.version
+    predictions = await prediction_batcher.submit(movies)
+    valid_movies = [data[i] for i in valid]
+    if PREDICTION_HISTORY_ENABLED and valid_movies:
+        background_tasks.add_task(persist_predictions, valid_movies, predictions, model_version)
+    best = top_indices(predictions)
+    selected = prediction_records([valid_movies[i] for i in best], predictions[best], parse_fields(fields))
+    result = [{**record, "film_key": film_key(valid_movies[i])} for record, i in zip(selected, best)]
+    if explain and result:
+        from app.explain import explain_executor, explain_movies, explanation
+        contributions = await explain_executor.run(explain_movies, [movies[i] for i in best])
+        for movie, values in zip(result, contributions):
+            movie["explanation"] = explanation(values)
+    return json_response(request, {"result" : result, "errors": errors})
+
+
+@router.get("/predictions")
+def get_prediction_history(
+    db: db_dependency,
+    current_user: Annotated[str, Depends(get_current_user)],
+    after: Annotated[Optional[int], Query(description="Curseur : 'next_after' de la page précédente")] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    week: Annotated[Optional[date], Query(description="Premier jour de la semaine de prédiction")] = None,
+    model_version: Optional[str] = None,
+):
+    """
+    Parcourt l'historique des prédictions enregistrées, sans appel au modèle.
+
+    Args:
+        db (Session): Session de base de données.
+        current_user (Users): Utilisateur actuellement authentifié.
+        after (int, optional): Renvoyer les prédictions enregistrées après celle-ci.
+        limit (int): Taille de la page.
+        week (date, optional): Filtrer sur une semaine.
+        model_version (str, optional): Filtrer sur une version du modèle.
+
+    Returns:
+        dict: Prédictions de la page ("items") et curseur de la page suivante ("next_after", None à la fin).
+    """
+    return list_predictions(db, after=after, limit=limit, week=week, model_version=model_version)
+
+
+@router.get("/predictions/top")     # déclarée avant /predictions/{film_id}
+def get_weekly_top(
+    db: db_dependency,
+    current_user: Annotated[str, Depends(get_current_user)],
+    week: Annotated[Optional[date], Query(description="Un jour de la semaine voulue, la semaine courante par défaut")] = None,
+    model_version: Annotated[Optional[str], Query(description="Version du modèle en service par défaut")] = None,
+):
+    """
+    Retourne le top précalculé des prédictions d'une semaine.
+
+    Args:
+        db (Session): Session de base de données.
+        current_user (Users): Utilisateur actuellement authentifié.
+        week (date, optional): Semaine voulue.
+        model_version (str, optional): Version du modèle.
+
+    Returns:
+        dict: Semaine, version du modèle et films classés ("top").
+    """
+    week = week_of(week)
+    model_version = model_version or model_registry.current.version
+    return {"week": week.isoformat(), "model_version": model_version, "top": weekly_top(db, week, model_version)}
+
+
+@router.get("/predictions/{film_id}")
+def get_film_predictions(film_id: str, db: db_dependency, current_user: Annotated[str, Depends(get_current_user)]):
+    """
+    Retourne les prédictions enregistrées d'un film.
+
+    Args:
+        film_id (str): Identifiant du film ('film_key' renvoyé par POST /predictions).
+        db (Session): Session de base de données.
+        current_user (Users): Utilisateur actuellement authentifié.
+
+    Returns:
+        dict: Identifiant du film et ses prédictions, de la plus récente à la plus ancienne.
+
+    Raises:
+        HTTPException: 404 si aucune prédiction n'est enregistrée pour ce film.
+    """
+    predictions = film_predictions(db, film_id)
+    if not predictions:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aucune prédiction pour ce film")
+    return {"film_key": film_id, "predictions": predictions}
+
+
+@router.post("/predictions/batch")
+async def get_batch_predictions(
+    request: Request,
+    current_user: Annotated[str, Depends(get_current_user)],
+    chunk_size: Annotated[int, Query(ge=1, le=10000, description="Films prédits par appel au modèle")] = BATCH_CHUNK_SIZE,
+    top_k: Annotated[Optional[int], Query(ge=1, le=BATCH_MAX_TOP_K, description="Ne renvoyer que les K meilleures prédictions")] = None,
+    fields: Annotated[Optional[str], Query(description="Champs des films à renvoyer, séparés par des virgules")] = None,
+):
+    """
+    Prédit un catalogue complet envoyé en NDJSON (un film par ligne) et renvoie les prédictions en flux NDJSON.
+
+    Args:
+        request (Request): Requête dont le corps est le catalogue NDJSON.
+        current_user (Users): Utilisateur actuellement authentifié.
+        chunk_size (int): Taille des paquets envoyés au modèle.
+        top_k (int, optional): Nombre de films à renvoyer, par prédiction décroissante.
+        fields (str, optional): Champs des films à renvoyer (tous par défaut) ; 'prediction' est toujours renvoyé.
+
+    Returns:
+        StreamingResponse: Films complétés de leur prédiction, au format application/x-ndjson
+            (compressé en brotli ou gzip si le client l'accepte).
+
+    Note:
+        - Sans top_k, tous les films sont renvoyés dans l'ordre d'entrée, paquet par paquet
+        - Une ligne {"error": ...} termine le flux si le catalogue est mal formé
+        - 503 si le pool de calcul est saturé au moment de la soumission
+    """
+    inference_executor.check_capacity()
+    body = await spool_request_body(request)
+    return ndjson_response(request, stream_predictions(body, chunk_size, top_k, parse_fields(fields)))
@@ -0,0 +1,132 @@
+# Explication des prédictions : contributions SHAP de CatBoost par variable du modèle
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.feature_builder import FEATURES_OF_INTEREST, frame_from_movies, get_feature_builder
+from app.feature_store import get_feature_store
+from app.inference import INFERENCE_EXECUTOR, InferenceExecutor
+from app.metrics import registry, stage_seconds
+from app.model_registry import model_registry
+from app.prediction_cache import PREDICTION_CACHE_TTL, PredictionCache
+from app.schemas import MovieInput
+
+
+EXPLAIN_WORKERS = int(os.getenv("EXPLAIN_WORKERS", 1))         # pool séparé : ne ralentit pas les prédictions
+EXPLAIN_QUEUE_SIZE = int(os.getenv("EXPLAIN_QUEUE_SIZE", EXPLAIN_WORKERS * 4))
+EXPLAIN_TIMEOUT = float(os.getenv("EXPLAIN_TIMEOUT", 60))      # en secondes
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", 10000))   # 0 = cache désactivé
+
+
+def _split_model(model) -> tuple:
+    """
+    Sépare le modèle en service en prétraitement et régresseur CatBoost.
+
+    Args:
+        model (Any): Pipeline scikit-learn (ColumnTransformer + CatBoostRegressor) ou NativeModel.
+
+    Returns:
+        tuple:
+            - Callable: Prétraitement, DataFrame FEATURES_OF_INTEREST -> matrice vue par CatBoost
+            - CatBoostRegressor: Régresseur
+            - np.ndarray: Pour chaque colonne de la matrice, l'indice de sa variable dans FEATURES_OF_INTEREST
+    """
+    if hasattr(model, "manifest"):     # NativeModel
+        owners = []
+        for step in model.manifest["preprocessing"]:
+            for i, column in enumerate(step["columns"]):
+                width = len(step["categories"][i]) if step["kind"] == "onehot" else 1
+                owners += [FEATURES_OF_INTEREST.index(column)] * width
+        return model.transform, model.regressor, np.array(owners)
+
+    transformer, regressor = model.steps[0][1], model.steps[-1][1]
+    owners = np.empty(sum(s.stop - s.start for s in transformer.output_indices_.values()), dtype=np.int64)
+    for name, step, columns in transformer.transformers_:
+        start = transformer.output_indices_[name].start
+        widths = [len(c) for c in step.categories_] if type(step).__name__ == "OneHotEncoder" else [1] * len(columns)
+        for column, width in zip(columns, widths):
+            owners[start:start + width] = FEATURES_OF_INTEREST.index(column)
+            start += width
+    return transformer.transform, regressor, owners
+
+
+def shap_values(model, data: pd.DataFrame) -> np.ndarray:
+    """
+    Calcule en un seul appel les contributions SHAP d'un lot de films.
+
+    Args:
+        model (Any): Modèle en service.
+        data (pd.DataFrame): Variables FEATURES_OF_INTEREST.
+
+    Returns:
+        np.ndarray: Matrice (films, len(FEATURES_OF_INTEREST) + 1) : contribution de chaque variable,
+            puis valeur de base du modèle en dernière colonne.
+
+    Note:
+        Les contributions des colonnes one-hot d'une même variable sont additionnées :
+        la somme d'une ligne reste égale à la prédiction non arrondie.
+    """
+    from catboost import Pool     # importé seulement quand une explication est demandée
+
+    preprocess, regressor, owners = _split_model(model)
+    matrix = preprocess(data)
+    if hasattr(matrix, "toarray"):     # sortie creuse du ColumnTransformer
+        matrix = matrix.toarray()
+    raw = regressor.get_feature_importance(Pool(matrix), type="ShapValues")
+    values = np.zeros((len(data), len(FEATURES_OF_INTEREST) + 1))
+    np.add.at(values.T, owners, raw[:, :-1].T)
+    values[:, -1] = raw[:, -1]
+    return values
+
+
+def explain_movies(movies: list[MovieInput]) -> np.ndarray:
+    """
+    Calcule les contributions SHAP d'une liste de films validés (exécuté dans le pool d'explication).
+
+    Args:
+        movies (list[MovieInput]): Films validés par validate_movies.
+
+    Returns:
+        np.ndarray: Contributions, dans l'ordre de la liste (voir shap_values).
+
+    Note:
+        Seuls les films absents du cache d'explications sont envoyés au modèle.
+    """
+    with registry.time(stage_seconds, "featurize"):
+        data = get_feature_builder().transform(frame_from_movies(movies))
+    loaded = model_registry.current
+    if not explanation_cache.enabled:
+        with registry.time(stage_seconds, "explain"):
+            return shap_values(loaded.model, data)
+    generation = (loaded.version, get_feature_store().generation)
+    keys = explanation_cache.keys(data)
+    result, missing = explanation_cache.get_many(keys, generation)
+    if missing.any():
+        with registry.time(stage_seconds, "explain"):
+            result[missing] = shap_values(loaded.model, data[missing])
+        explanation_cache.put_many(keys[missing], result[missing], generation)
+    return result
+
+
+def explanation(values: np.ndarray) -> dict:
+    """
+    Met en forme les contributions d'un film.
+
+    Args:
+        values (np.ndarray): Une ligne du résultat de explain_movies.
+
+    Returns:
+        dict: Valeur de base ("base_value") et contribution de chaque variable ("contributions"),
+            par valeur absolue décroissante.
+    """
+    order = np.argsort(-np.abs(values[:-1]), kind="stable")
+    return {
+        "base_value": float(values[-1]),
+        "contributions": {FEATURES_OF_INTEREST[i]: float(values[i]) for i in order},
+    }
+
+
+explanation_cache = PredictionCache(EXPLAIN_CACHE_SIZE, PREDICTION_CACHE_TTL, width=len(FEATURES_OF_INTEREST) + 1)
+explain_executor = InferenceExecutor(INFERENCE_EXECUTOR, EXPLAIN_WORKERS, EXPLAIN_QUEUE_SIZE, EXPLAIN_TIMEOUT,
+                                     name="explication")
@@ -0,0 +1,205 @@
+# Construction vectorisée des variables attendues par le modèle
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from app.feature_store import FeatureStore, get_feature_store
+from app.schemas import DATE_FORMAT, MovieInput
+
+
+FEATURES_OF_INTEREST = [
+    'released_year',
+    "country",
+    'category',
+    'classification',
+    'duration_minutes',
+    "top_actor_1",
+    "top_actor_2",
+    "top_actor_3",
+    "top_director",
+    'top_writer',
+    'top_distribution',
+    "top_actor_1_mid",
+    "top_actor_2_mid",
+    "top_actor_3_mid",
+    "top_director_mid",
+    'top_writer_mid',
+    'top_distribution_mid',
+    'top_pays',
+    'post_streaming',
+    'summer_holidays',
+    'christmas_period',
+    'is_award_season',]
+
+NUMERICAL_COLUMNS = [
+    'released_year',
+    "duration_minutes",]
+
+ORDINAL_COLUMNS = [
+    "top_actor_1",
+    "top_actor_2",
+    "top_actor_3",
+    "top_director",
+    'top_writer',
+    "top_actor_1_mid",
+    "top_actor_2_mid",
+    "top_actor_3_mid",
+    "top_director_mid",
+    'top_writer_mid',
+    'top_distribution_mid',
+    'top_distribution',
+    'top_pays',
+    'post_streaming',
+    'summer_holidays',
+    'christmas_period',
+    'is_award_season',]
+
+CATEGORICAL_COLUMNS = [
+    "country",
+    'category',
+    'classification',]
+
+# Variables calculées en plus de FEATURES_OF_INTEREST (non utilisées par le modèle actuel)
+EXTRA_FEATURES = ["summer", "automn", "winter", "spring", "is_covid"]
+
+# Colonne source -> préfixe des indicateurs top / top_mid
+TALENT_FLAGS = {
+    "actor_1": "top_actor_1",
+    "actor_2": "top_actor_2",
+    "actor_3": "top_actor_3",
+    "directors": "top_director",
+    "writer": "top_writer",
+    "distribution": "top_distribution",
+}
+
+# Champs de MovieInput lus par le FeatureBuilder
+INPUT_COLUMNS = [
+    'released_year',
+    'duration_minutes',
+    'country',
+    'category',
+    'classification',
+    'released_date',
+    *TALENT_FLAGS,]
+
+TOP_COUNTRIES = ['France', 'Etats-Unis', 'Grande-Bretagne']
+
+COVID_PERIODS = [   # périodes de fermeture des salles (bornes incluses)
+    (pd.Timestamp("2020-03-17"), pd.Timestamp("2020-05-11")),
+    (pd.Timestamp("2020-10-30"), pd.Timestamp("2020-12-15")),
+    (pd.Timestamp("2021-04-03"), pd.Timestamp("2021-05-03")),
+]
+
+STREAMING_START = pd.Timestamp("2014-09-15")    # arrivée de Netflix en France
+
+
+class FeatureBuilder:
+    """
+    Transforme des films bruts en variables pour le modèle, sans boucle Python par ligne.
+
+    Note:
+        - Les appartenances aux niveaux de talents sont testées avec isin sur des tableaux
+          précalculés à partir du FeatureStore
+        - Les indicateurs de date utilisent des masques sur .dt.month / .dt.day
+        - Une date absente ou mal formée (NaT) donne 0 pour tous les indicateurs de date
+        - released_date peut être déjà convertie (datetime64, voir frame_from_movies) ou en texte jj/mm/aaaa
+    """
+
+    def __init__(self, store: FeatureStore):
+        self.store = store
+        self._lookups = {
+            column: (np.array(list(store[column].top), dtype=object), np.array(list(store[column].mid), dtype=object))
+            for column in TALENT_FLAGS
+        }
+
+    def transform(self, df: pd.DataFrame, columns: Optional[list[str]] = None) -> pd.DataFrame:
+        """
+        Calcule les variables dérivées d'un lot de films.
+
+        Args:
+            df (pd.DataFrame): Films à prédire (une ligne par film), non modifié.
+            columns (list[str], optional): Colonnes à retourner, FEATURES_OF_INTEREST par défaut ;
+                les EXTRA_FEATURES ne sont calculées que si elles sont demandées.
+
+        Returns:
+            pd.DataFrame: Variables demandées, dans l'ordre indiqué.
+        """
+        features = {
+            "released_year": df["released_year"],
+            "country": df["country"],
+            "category": df["category"],
+            "classification": df["classification"],
+            "duration_minutes": df["duration_minutes"],
+        }
+
+        for column, flag in TALENT_FLAGS.items():
+            top, mid = self._lookups[column]
+            features[flag] = self._flag(df[column].isin(top))
+            features[f"{flag}_mid"] = self._flag(df[column].isin(mid))
+
+        features["top_pays"] = self._flag(df["country"].isin(TOP_COUNTRIES))
+
+        released_date = df["released_date"]
+        if not pd.api.types.is_datetime64_any_dtype(released_date):
+            released_date = pd.to_datetime(released_date.astype('string').str.strip(), format=DATE_FORMAT, errors='coerce')
+        month, day = released_date.dt.month, released_date.dt.day
+
+        columns = FEATURES_OF_INTEREST if columns is None else columns
+        if not set(EXTRA_FEATURES).isdisjoint(columns):     # calculées seulement si demandées
+            features["summer"] = self._flag(((month == 6) & (day >= 21)) | month.isin([7, 8]) | ((month == 9) & (day < 22)))
+            features["automn"] = self._flag(((month == 9) & (day >= 22)) | month.isin([10, 11]) | ((month == 12) & (day < 21)))
+            features["winter"] = self._flag(((month == 12) & (day >= 21)) | month.isin([1, 2]) | ((month == 3) & (day < 20)))
+            features["spring"] = self._flag(((month == 3) & (day >= 21)) | month.isin([4, 5]) | ((month == 6) & (day < 21)))
+
+            is_covid = pd.Series(False, index=df.index)
+            for start, end in COVID_PERIODS:
+                is_covid |= released_date.between(start, end)
+            features["is_covid"] = self._flag(is_covid)
+
+        features["post_streaming"] = self._flag(released_date >= STREAMING_START)
+        features["summer_holidays"] = self._flag((month >= 7) | ((month <= 9) & (day < 10)))
+        features["christmas_period"] = self._flag(((month == 12) & (day >= 20)) | ((month == 1) & (day <= 5)))
+        features["is_award_season"] = self._flag((month == 2) | ((month == 3) & (day <= 10)))
+
+        return pd.DataFrame({column: features[column] for column in columns}, index=df.index)
+
+    @staticmethod
+    def _flag(mask: pd.Series) -> pd.Series:
+        return mask.astype('int64')
+
+
+def frame_from_movies(movies: list[MovieInput]) -> pd.DataFrame:
+    """
+    Construit directement les colonnes lues par le FeatureBuilder à partir de films validés.
+
+    Args:
+        movies (list[MovieInput]): Films validés (released_date déjà convertie).
+
+    Returns:
+        pd.DataFrame: Colonnes INPUT_COLUMNS, released_date en datetime64 (NaT si absente).
+
+    Note:
+        Une liste par colonne plutôt qu'un DataFrame.from_records sur des dictionnaires :
+        les champs non utilisés par le modèle ne sont pas copiés.
+    """
+    columns = {column: [getattr(movie, column) for movie in movies] for column in INPUT_COLUMNS}
+    columns["released_date"] = pd.to_datetime(pd.Series(columns["released_date"], dtype=object))
+    return pd.DataFrame(columns)
+
+
+_builder: Optional[FeatureBuilder] = None
+
+
+def get_feature_builder() -> FeatureBuilder:
+    """
+    Retourne le FeatureBuilder associé aux tables de niveaux courantes.
+
+    Returns:
+        FeatureBuilder: Constructeur de variables, recréé seulement si les tables ont changé.
+    """
+    global _builder
+    store = get_feature_store()
+    builder = _builder
+    if builder is None or builder.store is not store:
+        builder = _builder = FeatureBuilder(store)
+    return builder
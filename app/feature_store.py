@@ -0,0 +1,402 @@
+# Tables de popularité des talents (acteurs, réalisateurs, scénaristes, distributeurs)
+#
+# Ajout de résultats au box-office : python -m app.feature_store resultats.ndjson
+import argparse
+import json
+import os
+import threading
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import numpy as np
+
+from app.dataset import DATASET_PATH, DATASET_ARTIFACT_DIR, TALENT_COLUMNS, ColumnarDataset, file_checksum, load_dataset
+from app.metrics import registry, stage_seconds
+
+TOP_THRESHOLD = 500000          # moyenne d'entrées hebdomadaires au-delà de laquelle un talent est "top"
+MID_LOWER, MID_UPPER = 250000, 500001   # bornes exclusives de la tranche "mid"
+
+TALENT_LOG_PATH = os.getenv("TALENT_LOG_PATH", "app/box_office_log.ndjson")    # résultats ajoutés depuis le jeu de données
+
+
+@dataclass(frozen=True)
+class TalentTier:
+    """
+    Niveaux de popularité calculés pour une colonne de talents.
+
+    Attributes:
+        means (Mapping[str, float]): Moyenne des entrées hebdomadaires par nom (lecture seule).
+        top (frozenset): Noms dont la moyenne dépasse TOP_THRESHOLD.
+        mid (frozenset): Noms dont la moyenne est comprise entre MID_LOWER et MID_UPPER.
+        sums (Mapping[str, float]): Somme des entrées hebdomadaires par nom.
+        counts (Mapping[str, int]): Nombre de films par nom.
+    """
+    means: Mapping[str, float]
+    top: frozenset
+    mid: frozenset
+    sums: Mapping[str, float]
+    counts: Mapping[str, int]
+
+    def updated(self, additions: Mapping[str, tuple[float, int]]) -> "TalentTier":
+        """
+        Retourne une nouvelle colonne après ajout de films, en ne reclassant que les noms concernés.
+
+        Args:
+            additions (Mapping[str, tuple[float, int]]): Par nom, somme des entrées et nombre des films ajoutés.
+
+        Returns:
+            TalentTier: Colonne mise à jour (l'instance courante n'est pas modifiée).
+        """
+        means, sums, counts = dict(self.means), dict(self.sums), dict(self.counts)
+        top, mid = set(self.top), set(self.mid)
+        for name, (amount, films) in additions.items():
+            sums[name] = sums.get(name, 0.0) + amount
+            counts[name] = counts.get(name, 0) + films
+            mean = means[name] = sums[name] / counts[name]
+            (top.add if mean > TOP_THRESHOLD else top.discard)(name)
+            (mid.add if MID_LOWER < mean < MID_UPPER else mid.discard)(name)
+        return TalentTier(
+            means=MappingProxyType(means),
+            top=frozenset(top),
+            mid=frozenset(mid),
+            sums=MappingProxyType(sums),
+            counts=MappingProxyType(counts),
+        )
+
+
+@dataclass(frozen=True)
+class FeatureStore:
+    """
+    Ensemble immuable des niveaux de talents, partagé par toutes les requêtes.
+
+    Attributes:
+        tiers (Mapping[str, TalentTier]): Niveaux indexés par nom de colonne (actor_1, directors...).
+        source (str): Fichier JSON ou dossier colonnaire ayant servi au calcul.
+        version (str): Empreinte SHA-256 (tronquée) du fichier JSON d'origine.
+        log_position (int): Octets du journal TALENT_LOG_PATH déjà appliqués.
+    """
+    tiers: Mapping[str, TalentTier]
+    source: str
+    version: str
+    log_position: int = 0
+
+    def __getitem__(self, column: str) -> TalentTier:
+        return self.tiers[column]
+
+    @property
+    def generation(self) -> str:
+        """
+        Identifie le contenu des tables : jeu de données d'origine et résultats ajoutés depuis.
+        """
+        return f"{self.version}+{self.log_position}" if self.log_position else self.version
+
+
+def build_tier(names: list, sums: np.ndarray, counts: np.ndarray) -> TalentTier:
+    """
+    Construit les ensembles top / mid à partir des sommes et effectifs par nom.
+
+    Args:
+        names (list): Noms, dans l'ordre des codes.
+        sums (np.ndarray): Somme des entrées hebdomadaires par nom.
+        counts (np.ndarray): Nombre de films par nom.
+
+    Returns:
+        TalentTier: Niveaux de popularité de la colonne.
+    """
+    means = sums / counts
+    names = np.asarray(names, dtype=object)
+    keys = names.tolist()
+    return TalentTier(
+        means=MappingProxyType(dict(zip(keys, means.tolist()))),
+        top=frozenset(names[means > TOP_THRESHOLD].tolist()),
+        mid=frozenset(names[(means < MID_UPPER) & (means > MID_LOWER)].tolist()),
+        sums=MappingProxyType(dict(zip(keys, np.asarray(sums, dtype=np.float64).tolist()))),
+        counts=MappingProxyType(dict(zip(keys, np.asarray(counts).tolist()))),
+    )
+
+
+def tier_from_codes(codes: np.ndarray, names: list, entrances: np.ndarray) -> TalentTier:
+    """
+    Agrège les entrées par nom à partir d'une colonne codée (équivalent de groupby(...).mean()).
+
+    Args:
+        codes (np.ndarray): Code du nom de chaque film (-1 si absent, ignoré).
+        names (list): Dictionnaire code -> nom.
+        entrances (np.ndarray): Entrées hebdomadaires de chaque film.
+
+    Returns:
+        TalentTier: Niveaux de popularité de la colonne.
+
+    Note:
+        Les entrées sont entières : leurs sommes en float64 sont exactes, les moyennes
+        sont identiques à celles de pandas.
+    """
+    valid = codes >= 0
+    counts = np.bincount(codes[valid], minlength=len(names))
+    sums = np.bincount(codes[valid], weights=entrances[valid], minlength=len(names))
+    return build_tier(names, sums, counts)
+
+
+def feature_store_from_dataset(dataset: ColumnarDataset) -> FeatureStore:
+    """
+    Calcule les niveaux de talents à partir des colonnes du jeu de données.
+
+    Args:
+        dataset (ColumnarDataset): Colonnes codées (artefact mappé ou JSON converti).
+
+    Returns:
+        FeatureStore: Tables de niveaux prêtes à l'emploi.
+    """
+    tiers = {
+        column: tier_from_codes(np.asarray(dataset.codes[column]), dataset.categories[column], np.asarray(dataset.entrances))
+        for column in TALENT_COLUMNS
+    }
+    return FeatureStore(tiers=MappingProxyType(tiers), source=dataset.source, version=dataset.version)
+
+
+def build_feature_store(path: str = DATASET_PATH, artifact_dir: str = DATASET_ARTIFACT_DIR) -> FeatureStore:
+    """
+    Calcule les niveaux de talents à partir du jeu de données historique.
+
+    Args:
+        path (str): Chemin du fichier JSON des films (DATASET_FINAL.json).
+        artifact_dir (str): Dossier de l'artefact colonnaire, utilisé s'il est à jour.
+
+    Returns:
+        FeatureStore: Tables de niveaux prêtes à l'emploi.
+    """
+    return feature_store_from_dataset(load_dataset(path, artifact_dir))
+
+
+def read_log(path: str = TALENT_LOG_PATH, start: int = 0) -> tuple[list[dict], int]:
+    """
+    Lit les résultats ajoutés au journal depuis la position start.
+
+    Args:
+        path (str): Journal NDJSON des résultats au box-office.
+        start (int): Position (en octets) de la première ligne non encore appliquée.
+
+    Returns:
+        tuple:
+            - list[dict]: Résultats lus
+            - int: Position après la dernière ligne complète
+
+    Note:
+        Une dernière ligne sans retour à la ligne (écriture en cours) est laissée pour la lecture suivante.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            chunk = f.read()
+    except FileNotFoundError:
+        return [], start
+    end = chunk.rfind(b"\n") + 1
+    records = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+    return records, start + end
+
+
+def apply_records(store: FeatureStore, records: list[dict], log_position: int) -> FeatureStore:
+    """
+    Ajoute des résultats au box-office aux tables de niveaux, sans recalculer les noms non concernés.
+
+    Args:
+        store (FeatureStore): Tables courantes (non modifiées).
+        records (list[dict]): Résultats lus dans le journal.
+        log_position (int): Position du journal après ces résultats.
+
+    Returns:
+        FeatureStore: Nouvelles tables.
+
+    Note:
+        Les résultats enregistrés pour une autre version du jeu de données (champ "base") sont ignorés :
+        après remplacement de DATASET_FINAL.json, ils sont supposés y figurer déjà.
+    """
+    additions: dict[str, dict[str, list]] = {column: {} for column in TALENT_COLUMNS}
+    for record in records:
+        if record.get("base") != store.version:
+            continue
+        for column in TALENT_COLUMNS:
+            name = record.get(column)
+            if name is None:
+                continue
+            total = additions[column].setdefault(name, [0.0, 0])
+            total[0] += record["weekly_entrances"]
+            total[1] += 1
+    tiers = {
+        column: store[column].updated(additions[column]) if additions[column] else store[column]
+        for column in TALENT_COLUMNS
+    }
+    return replace(store, tiers=MappingProxyType(tiers), log_position=log_position)
+
+
+def replay_log(store: FeatureStore, path: str = TALENT_LOG_PATH) -> FeatureStore:
+    """
+    Applique aux tables les résultats du journal non encore pris en compte.
+    """
+    records, position = read_log(path, store.log_position)
+    if position == store.log_position:
+        return store
+    return apply_records(store, records, position)
+
+
+_store: Optional[FeatureStore] = None
+_store_lock = threading.Lock()
+_log_lock = threading.RLock()    # un seul ajout ou rafraîchissement du journal à la fois
+
+
+def load_feature_store(path: str = DATASET_PATH) -> FeatureStore:
+    """
+    Calcule et publie les tables de niveaux (appelé au démarrage de l'application).
+
+    Args:
+        path (str): Chemin du jeu de données historique.
+
+    Returns:
+        FeatureStore: Tables publiées, résultats du journal compris.
+    """
+    global _store
+    with registry.time(stage_seconds, "feature_store_load"):
+        store = replay_log(build_feature_store(path))
+    with _store_lock:
+        _store = store
+    return store
+
+
+def refresh_from_log() -> bool:
+    """
+    Publie de nouvelles tables si des résultats ont été ajoutés au journal (par ce processus ou un autre).
+
+    Returns:
+        bool: True si de nouvelles tables ont été publiées.
+
+    Note:
+        - Appelé à chaque prédiction : sans ajout au journal, le coût se limite à un os.stat
+        - Les tables sont remplacées par une simple affectation : les requêtes en cours
+          gardent les anciennes jusqu'à leur fin
+    """
+    global _store
+    try:
+        if os.stat(TALENT_LOG_PATH).st_size <= get_feature_store().log_position:
+            return False
+    except FileNotFoundError:
+        return False
+    with _log_lock:
+        store = get_feature_store()
+        refreshed = replay_log(store, TALENT_LOG_PATH)
+        if refreshed is store:
+            return False
+        with _store_lock:
+            _store = refreshed
+        return True
+
+
+def reload_feature_store_if_changed() -> bool:
+    """
+    Recalcule les tables de niveaux si le jeu de données a changé sur disque,
+    sinon applique les résultats ajoutés au journal.
+
+    Returns:
+        bool: True si de nouvelles tables ont été publiées.
+    """
+    store = get_feature_store()
+    if file_checksum(DATASET_PATH) == store.version:
+        return refresh_from_log()
+    load_feature_store()
+    return True
+
+
+def get_feature_store() -> FeatureStore:
+    """
+    Retourne les tables de niveaux partagées, en les calculant au premier appel si besoin.
+
+    Returns:
+        FeatureStore: Tables de niveaux courantes.
+
+    Note:
+        Le chargement normal a lieu au démarrage de FastAPI ; le chargement paresseux
+        sert aux scripts qui appellent use_model hors de l'application.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = replay_log(build_feature_store())
+    return _store
+
+
+def tier_changes(before: FeatureStore, after: FeatureStore) -> dict:
+    """
+    Liste, par colonne, les noms entrés dans ou sortis des niveaux top et mid.
+    """
+    changes = {}
+    for column in TALENT_COLUMNS:
+        old, new = before[column], after[column]
+        if old is new:
+            continue
+        diff = {
+            f"{tier}_{direction}": sorted(names)
+            for tier in ("top", "mid")
+            for direction, names in (("added", getattr(new, tier) - getattr(old, tier)),
+                                     ("removed", getattr(old, tier) - getattr(new, tier)))
+            if names
+        }
+        if diff:
+            changes[column] = diff
+    return changes
+
+
+def ingest_box_office(rows: list) -> dict:
+    """
+    Ajoute des résultats hebdomadaires au journal puis publie les tables mises à jour.
+
+    Args:
+        rows (list): Résultats (weekly_entrances et talents du film), un dictionnaire par film.
+
+    Returns:
+        dict: Nombre de résultats ajoutés, lignes rejetées, nouvelle génération des tables
+            et noms ayant changé de niveau.
+
+    Note:
+        - Les lignes sont écrites en un seul appel en mode ajout : les autres workers
+          les lisent avant leur prochaine prédiction (voir refresh_from_log)
+        - Seuls les noms présents dans les nouveaux résultats sont reclassés
+    """
+    from app.schemas import box_office_list_adapter, validate_rows
+    records, _, errors = validate_rows(box_office_list_adapter, rows)
+    with _log_lock:
+        before = get_feature_store()
+        if records:
+            payload = "".join(
+                json.dumps({**record.model_dump(), "base": before.version}, ensure_ascii=False) + "\n"
+                for record in records
+            )
+            with open(TALENT_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+        refresh_from_log()
+        after = get_feature_store()
+    return {
+        "ingested": len(records),
+        "errors": errors,
+        "generation": after.generation,
+        "changes": tier_changes(before, after),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajoute des résultats au box-office aux niveaux des talents.")
+    parser.add_argument("path", help="Fichier NDJSON ou liste JSON des résultats hebdomadaires")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8") as f:
+        content = f.read()
+    stripped = content.lstrip()
+    rows = json.loads(content) if stripped.startswith("[") else [json.loads(line) for line in content.splitlines() if line.strip()]
+    report = ingest_box_office(rows)
+    for error in report["errors"]:
+        print(f"⚠️ ligne {error['index']} rejetée : {error['errors']}")
+    for column, diff in report["changes"].items():
+        print(f"{column} : {diff}")
+    print(f"✅ {report['ingested']} résultats ajoutés (tables {report['generation']})")
@@ -0,0 +1,132 @@
+# Exécution des prédictions hors de la boucle d'événements
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from app.model_registry import model_registry
+
+
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")     # "thread" ou "process"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", os.cpu_count() or 1))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", INFERENCE_WORKERS * 4))   # tâches en attente au-delà des workers
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", 30))      # en secondes
+
+
+def _init_process() -> None:
+    """
+    Charge les tables de niveaux et le modèle dans un processus de calcul (déjà présents s'il est issu d'un fork).
+    """
+    from app.feature_store import get_feature_store
+    get_feature_store()
+    model_registry.current
+
+
+def _run_in_process(fn: Callable, *args) -> Any:
+    from app.feature_store import refresh_from_log
+    model_registry.reload_if_changed()     # suit les rechargements à chaud du processus principal
+    refresh_from_log()                     # et les résultats au box-office ajoutés (lecture de la fin du journal)
+    return fn(*args)
+
+
+class InferenceExecutor:
+    """
+    Pool de calcul (threads ou processus) dont la file d'attente est bornée.
+
+    Note:
+        - Au-delà de workers + queue_size tâches en cours, les nouvelles requêtes reçoivent une 503
+        - Une tâche qui dépasse timeout secondes renvoie une 504 ; elle est annulée si elle n'a pas démarré
+        - Une place n'est libérée qu'à la fin réelle de la tâche, pour ne pas surcharger le pool
+    """
+
+    def __init__(self, kind: str = INFERENCE_EXECUTOR, workers: int = INFERENCE_WORKERS,
+                 queue_size: int = INFERENCE_QUEUE_SIZE, timeout: float = INFERENCE_TIMEOUT,
+                 name: str = "prédiction"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"INFERENCE_EXECUTOR inconnu : {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self.name = name
+        self.pending = 0
+        self._pool: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.capacity
+
+    def check_capacity(self) -> None:
+        """
+        Lève une 503 si la file d'attente est pleine.
+
+        Raises:
+            HTTPException: 503 avec un en-tête Retry-After.
+        """
+        if self.saturated:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Service de {self.name} saturé, veuillez réessayer",
+                headers={"Retry-After": "1"},
+            )
+
+    async def run(self, fn: Callable, *args, reject: bool = True) -> Any:
+        """
+        Exécute fn(*args) dans le pool et attend son résultat sans bloquer la boucle d'événements.
+
+        Args:
+            fn (Callable): Fonction à exécuter (définie au niveau d'un module en mode "process").
+            *args: Arguments de fn.
+            reject (bool): Si False, la tâche attend son tour même quand la file est pleine
+                (paquets d'un lot déjà accepté).
+
+        Returns:
+            Any: Résultat de fn.
+
+        Raises:
+            HTTPException:
+                - 503: Si la file d'attente est pleine
+                - 504: Si la tâche dépasse le délai configuré
+        """
+        if reject:
+            self.check_capacity()
+        self.start()
+        loop = asyncio.get_running_loop()
+        if self.kind == "process":
+            future = self._pool.submit(_run_in_process, fn, *args)
+        else:
+            future = self._pool.submit(fn, *args)
+        self.pending += 1
+        future.add_done_callback(lambda _: self._release_from(loop))
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=f"Délai de {self.name} dépassé")
+
+    def _release_from(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:    # boucle déjà fermée (arrêt de l'application)
+            pass
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+
+inference_executor = InferenceExecutor()
@@ -0,0 +1,334 @@
+# Tâches de scoring de catalogues complets, en arrière-plan (file d'attente en base, sans courtier externe)
+#
+# Worker dédié : python -m app.jobs
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import time
+import uuid
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+
+from app.batch import iter_ndjson_chunks
+from app.database import engine
+from app.inference import INFERENCE_EXECUTOR, InferenceExecutor
+from app.metrics import registry, stage_seconds
+from app.model_registry import model_registry
+from app.modeles import ScoringJobs
+from app.schemas import validate_movies
+from app.serialization import dump_line, prediction_records
+
+
+JOBS_DIR = os.getenv("JOBS_DIR", "app/jobs")     # catalogues reçus et résultats compressés
+JOBS_RUNNER = os.getenv("JOBS_RUNNER", "true").lower() in ("1", "true", "yes")  # exécuter les tâches dans les workers web
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))                    # tâches exécutées en parallèle par processus
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))      # en secondes
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", 600))        # en secondes sans progression : tâche reprise
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", 6 * 3600))           # en secondes
+
+logger = logging.getLogger(__name__)
+
+
+def input_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.ndjson")
+
+
+def result_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.ndjson.gz")
+
+
+class ClaimLost(Exception):
+    """
+    La tâche a été reprise par un autre worker (réservation expirée) : ce worker l'abandonne.
+    """
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+_engine_pid = os.getpid()
+
+
+def _session() -> Session:
+    """
+    Ouvre une session, sans réutiliser les connexions héritées d'un processus parent (pool en mode "process").
+    """
+    global _engine_pid
+    if os.getpid() != _engine_pid:
+        engine.dispose(close=False)
+        _engine_pid = os.getpid()
+    return Session(engine)
+
+
+def job_to_dict(job: ScoringJobs) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "rejected": job.rejected,
+        "progress": job.processed / job.total if job.total else 1.0,
+        "chunk_size": job.chunk_size,
+        "model_version": job.model_version,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "result": f"/jobs/{job.id}/result" if job.status == "done" else None,
+    }
+
+
+async def submit_job(request: Request, chunk_size: int, owner_id: Optional[int]) -> ScoringJobs:
+    """
+    Enregistre le catalogue NDJSON de la requête et crée la tâche correspondante.
+
+    Args:
+        request (Request): Requête dont le corps est le catalogue NDJSON.
+        chunk_size (int): Films prédits par appel au modèle.
+        owner_id (int, optional): Utilisateur ayant soumis la tâche.
+
+    Returns:
+        ScoringJobs: Tâche en attente ("pending").
+
+    Note:
+        - Le catalogue est copié sur disque au fil de sa réception : la mémoire reste bornée
+          quelle que soit sa taille
+        - Les écritures sur disque et en base sont faites hors de la boucle d'événements
+    """
+    await run_in_threadpool(os.makedirs, JOBS_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    total, pending = 0, b""
+    f = await run_in_threadpool(open, input_path(job_id), "wb")
+    try:
+        async for data in request.stream():
+            await run_in_threadpool(f.write, data)
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            total += sum(1 for line in lines if line.strip())
+    finally:
+        await run_in_threadpool(f.close)
+    total += 1 if pending.strip() else 0
+    now = _now()
+    job = ScoringJobs(id=job_id, status="pending", owner_id=owner_id, chunk_size=chunk_size,
+                      total=total, created_at=now, updated_at=now)
+    return await run_in_threadpool(_insert_job, job)
+
+
+def _insert_job(job: ScoringJobs) -> ScoringJobs:
+    with _session() as session:
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        session.expunge(job)
+    return job
+
+
+def get_job(job_id: str, owner_id: Optional[int] = None) -> ScoringJobs:
+    """
+    Lit une tâche.
+
+    Args:
+        job_id (str): Identifiant de la tâche.
+        owner_id (int, optional): Si renseigné, seules les tâches de cet utilisateur sont visibles.
+
+    Raises:
+        HTTPException: 404 si la tâche n'existe pas (ou appartient à un autre utilisateur).
+    """
+    with _session() as session:
+        job = session.get(ScoringJobs, job_id)
+    if job is None or (owner_id is not None and job.owner_id != owner_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tâche introuvable")
+    return job
+
+
+def claim_next_job() -> Optional[tuple[str, str]]:
+    """
+    Réserve la plus ancienne tâche en attente (ou abandonnée depuis JOB_STALE_AFTER secondes).
+
+    Returns:
+        tuple[str, str] | None: Identifiant de la tâche réservée et jeton de la réservation,
+            None si aucune n'est disponible.
+
+    Note:
+        - La réservation est une mise à jour conditionnelle : si plusieurs workers visent
+          la même tâche, un seul la modifie et l'obtient
+        - Reprendre une tâche abandonnée change son jeton : l'ancien worker, s'il tourne encore,
+          ne peut plus la modifier (voir run_job)
+    """
+    stale = _now() - timedelta(seconds=JOB_STALE_AFTER)
+    available = or_(
+        ScoringJobs.status == "pending",
+        and_(ScoringJobs.status == "running", ScoringJobs.updated_at < stale),
+    )
+    with _session() as session:
+        candidates = session.exec(
+            select(ScoringJobs.id).where(available).order_by(ScoringJobs.created_at).limit(JOB_WORKERS + 1)
+        ).all()
+        for job_id in candidates:
+            token = uuid.uuid4().hex
+            claimed = session.execute(
+                update(ScoringJobs)
+                .where(ScoringJobs.id == job_id, available)
+                .values(status="running", processed=0, rejected=0, error=None, claim_token=token, updated_at=_now())
+            )
+            session.commit()
+            if claimed.rowcount == 1:
+                return job_id, token
+    return None
+
+
+def _update_job(job_id: str, token: str, **values) -> None:
+    """
+    Met à jour une tâche, à condition qu'elle soit toujours réservée avec ce jeton.
+
+    Raises:
+        ClaimLost: Si la tâche a été reprise par un autre worker.
+    """
+    with _session() as session:
+        updated = session.execute(
+            update(ScoringJobs)
+            .where(ScoringJobs.id == job_id, ScoringJobs.claim_token == token)
+            .values(updated_at=_now(), **values)
+        )
+        session.commit()
+    if updated.rowcount != 1:
+        raise ClaimLost(job_id)
+
+
+def run_job(job_id: str, token: str) -> None:
+    """
+    Prédit le catalogue d'une tâche paquet par paquet et écrit les résultats compressés (gzip, NDJSON).
+
+    Args:
+        job_id (str): Tâche réservée par claim_next_job.
+        token (str): Jeton de la réservation.
+
+    Note:
+        - Une ligne par film, dans l'ordre du catalogue, comme POST /predictions/batch
+        - L'avancement est enregistré après chaque paquet
+        - Chaque réservation écrit son propre fichier partiel ; le résultat n'est publié
+          (renommage atomique) qu'une fois le catalogue entièrement prédit
+        - Si la tâche a été reprise par un autre worker entre-temps, celui-ci s'arrête
+          sans toucher au résultat ni à la tâche
+    """
+    from app.use_model import predict_movies
+
+    job = get_job(job_id)
+    partial = f"{result_path(job_id)}.{token}.part"
+    processed = rejected = 0
+    try:
+        model_version = model_registry.current.version
+        with open(input_path(job_id), "rb") as source, gzip.open(partial, "wb") as output:
+            for chunk in iter_ndjson_chunks(source, job.chunk_size):
+                with registry.time(stage_seconds, "job_chunk"):
+                    movies, valid, errors = validate_movies(chunk)
+                    for error in errors:
+                        output.write(dump_line({**error, "index": processed + error["index"]}))
+                    if movies:
+                        valid_chunk = chunk if len(valid) == len(chunk) else [chunk[i] for i in valid]
+                        output.write(b"".join(dump_line(record) for record in prediction_records(valid_chunk, predict_movies(movies))))
+                processed += len(chunk)
+                rejected += len(errors)
+                _update_job(job_id, token, processed=processed, rejected=rejected)
+        _update_job(job_id, token)     # toujours réservée juste avant la publication
+        os.replace(partial, result_path(job_id))
+        _update_job(job_id, token, status="done", model_version=model_version, finished_at=_now())
+    except ClaimLost:
+        with suppress(FileNotFoundError):
+            os.remove(partial)
+        return
+    except KeyError as e:
+        _fail_job(job_id, token, partial, f"Colonne manquante : {e}")
+        return
+    except Exception as e:  # la tâche échoue, le worker continue avec les suivantes
+        _fail_job(job_id, token, partial, str(e) or type(e).__name__)
+        return
+    with suppress(FileNotFoundError):
+        os.remove(input_path(job_id))
+
+
+def _fail_job(job_id: str, token: str, partial: str, error: str) -> None:
+    with suppress(FileNotFoundError):
+        os.remove(partial)
+    with suppress(ClaimLost):
+        _update_job(job_id, token, status="failed", error=error, finished_at=_now())
+
+
+class JobRunner:
+    """
+    Exécute les tâches en attente dans un pool dédié, à côté des requêtes web.
+
+    Note:
+        - Chaque worker web (ou python -m app.jobs) réserve lui-même ses tâches en base :
+          aucun courtier externe n'est nécessaire
+        - Le pool est distinct de celui des prédictions : les requêtes POST /predictions
+          n'attendent jamais derrière un catalogue
+    """
+
+    def __init__(self, executor: InferenceExecutor, slots: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.executor = executor
+        self.slots = slots
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self.executor.start()
+            self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.slots)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+        self.executor.shutdown()
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                claim = await loop.run_in_executor(None, claim_next_job)
+                if claim is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                with suppress(HTTPException):   # délai dépassé : la tâche reprendra une fois abandonnée
+                    await self.executor.run(run_job, *claim, reject=False)
+            except Exception:   # base indisponible, pool de processus cassé... : on réessaie au tour suivant
+                logger.exception("Exécution des tâches de scoring interrompue, nouvel essai dans %s s", self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
+
+
+job_executor = InferenceExecutor(INFERENCE_EXECUTOR, JOB_WORKERS, 0, JOB_TIMEOUT, name="scoring en arrière-plan")
+job_runner = JobRunner(job_executor)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exécute les tâches de scoring en attente (worker dédié).")
+    parser.add_argument("--once", action="store_true", help="s'arrêter quand il n'y a plus de tâche en attente")
+    args = parser.parse_args()
+
+    from app.database import init_db
+    from app.feature_store import refresh_from_log
+    init_db()
+    while True:
+        claim = claim_next_job()
+        if claim is None:
+            if args.once:
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+            model_registry.reload_if_changed()
+            refresh_from_log()
+            continue
+        job_id, token = claim
+        run_job(job_id, token)
+        print(f"tâche {job_id} : {get_job(job_id).status}")
@@ -1,14 +1,188 @@
 # Point d'entrée de l'application
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager, suppress
+from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.endpoints import route_admin, route_auth, route_prediction
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.endpoints import route_admin, route_auth, route_jobs, route_prediction
+from app.database import init_db, pool_metrics, pool_stats
+from app.model_registry import model_registry, MODEL_WATCH_INTERVAL
+from app.inference import inference_executor
+from app.jobs import JOBS_RUNNER, job_executor, job_runner
+from app.metrics import MetricsMiddleware, gauge, histogram_lines, registry
+from app.startup import require_ready, startup_state
+from app.utils import login_executor
+
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_IN_BACKGROUND = os.getenv("PRELOAD_IN_BACKGROUND", "false").lower() in ("1", "true", "yes")  # servir avant la fin du chargement
+
+
+def collect_runtime_metrics() -> list[str]:
+    """
+    Lit, au moment de l'export, l'état tenu par les autres composants (pools, base de données).
+    """
+    pool = pool_stats()
+    return [
+        *gauge("movies_ready", "Modèle et tables de niveaux chargés", int(startup_state.ready)),
+        *gauge("movies_inference_pending", "Calculs de prédiction en cours ou en attente", inference_executor.pending),
+        *gauge("movies_inference_capacity", "Calculs de prédiction acceptés avant refus (503)", inference_executor.capacity),
+        *gauge("movies_jobs_pending", "Tâches de scoring en cours dans ce worker", job_executor.pending),
+        *gauge("movies_login_pending", "Vérifications de mot de passe en cours ou en attente", login_executor.pending),
+        *gauge("movies_db_pool_checked_out", "Connexions empruntées au pool", pool.get("checked_out", 0)),
+        *gauge("movies_db_pool_capacity", "Connexions maximales du pool (taille + débordement)", pool.get("capacity", 0)),
+        *histogram_lines("movies_db_pool_checkout_wait_seconds", "Attente d'une connexion du pool",
+                         pool_metrics.checkout_wait_ms, scale=0.001),
+        *gauge("movies_db_pool_checkout_timeouts_total", "Connexions non obtenues dans le délai",
+               pool_metrics.checkout_timeouts, kind="counter"),
+    ]
+
+
+def collect_model_metrics() -> list[str]:
+    """
+    Lit l'état de la chaîne de prédiction (micro-batcher, caches), une fois celle-ci chargée.
+    """
+    if not startup_state.ready:
+        return []
+    from app.batcher import prediction_batcher
+    from app.explain import explain_executor, explanation_cache
+    from app.prediction_cache import prediction_cache
+
+    cache = prediction_cache.stats()
+    explanations = explanation_cache.stats()
+    return [
+        *histogram_lines("movies_request_rows", "Films par requête POST /predictions", prediction_batcher.request_sizes),
+        *histogram_lines("movies_microbatch_rows", "Films par lot envoyé au modèle", prediction_batcher.batch_sizes),
+        *histogram_lines("movies_microbatch_queue_delay_seconds", "Attente d'une requête avant l'envoi de son lot",
+                         prediction_batcher.queue_delays_ms, scale=0.001),
+        *gauge("movies_explain_pending", "Calculs d'explication en cours ou en attente", explain_executor.pending),
+        *gauge("movies_prediction_cache_entries", "Prédictions en cache", cache["size"]),
+        *gauge("movies_prediction_cache_hits_total", "Prédictions servies par le cache", cache["hits"], kind="counter"),
+        *gauge("movies_prediction_cache_misses_total", "Prédictions calculées par le modèle", cache["misses"], kind="counter"),
+        *gauge("movies_explanation_cache_entries", "Explications en cache", explanations["size"]),
+        *gauge("movies_explanation_cache_hits_total", "Explications servies par le cache", explanations["hits"], kind="counter"),
+    ]
+
+
+registry.register_collector(collect_runtime_metrics)
+registry.register_collector(collect_model_metrics)
+
+
+async def watch_model(interval: float):
+    """
+    Vérifie périodiquement si le modèle ou le jeu de données ont changé et les recharge à chaud.
+
+    Note:
+        Un rechargement en échec (fichier en cours de copie ou absent, préchauffage en erreur)
+        est journalisé : le modèle et les tables en service sont conservés et la surveillance continue.
+    """
+    from app.feature_store import reload_feature_store_if_changed
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(model_registry.reload_if_changed)
+        except Exception:
+            logger.exception("Rechargement du modèle impossible, le modèle en service est conservé")
+        try:
+            await run_in_threadpool(reload_feature_store_if_changed)
+        except Exception:
+            logger.exception("Rechargement des niveaux des talents impossible, les tables en service sont conservées")
+
+
+def preload():
+    """
+    Charge les ressources partagées en lecture seule.
+
+    Note:
+        - Appelé par gunicorn dans le processus parent avant fork (voir gunicorn.conf.py),
+          puis par chaque worker au démarrage, où il n'a alors plus rien à faire
+        - La chaîne de prédiction (pandas, NumPy, modèle) n'est importée qu'ici : les modules de
+          l'application (routes, batch) l'importent dans les fonctions qui l'utilisent, pour que
+          l'import de app.main reste léger (voir python -m app.startup pour le profil)
+        - La durée de chaque étape est conservée dans startup_state (GET /ready)
+    """
+    with startup_state.phase("init_db"):
+        init_db()               # création des tables manquantes
+    with startup_state.phase("import_pipeline"):
+        from app import batcher, explain    # noqa: F401 (micro-batcher et explications : pandas, NumPy)
+        from app.feature_store import get_feature_store
+        from app.use_model import warm_up
+    with startup_state.phase("feature_store"):
+        get_feature_store()     # tables de niveaux des talents
+    with startup_state.phase("model"):
+        model_registry.ensure_loaded(warm_up=warm_up)   # modèle chargé et préchauffé
+    startup_state.ready = True
+
+
+def load_resources():
+    """
+    Charge les ressources d'un worker, en tenant compte des fichiers modifiés depuis le chargement du parent.
+    """
+    try:
+        preload()
+        from app.feature_store import reload_feature_store_if_changed
+        model_registry.reload_if_changed()      # worker recyclé : fichiers modifiés depuis le chargement du parent
+        reload_feature_store_if_changed()
+    except Exception as e:
+        startup_state.error = f"{type(e).__name__}: {e}"
+        raise
+
+
+async def load_in_background():
+    """
+    Charge les ressources dans un thread, puis démarre les tâches de scoring qui en dépendent.
+    """
+    await run_in_threadpool(load_resources)
+    if JOBS_RUNNER:
+        job_runner.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Charge une seule fois les ressources partagées avant de servir les requêtes.
+
+    Note:
+        Avec PRELOAD_IN_BACKGROUND, le serveur répond dès son démarrage et le chargement
+        se poursuit dans un thread : GET /ready, les prédictions et les tâches renvoient 503
+        jusqu'à sa fin, et les tâches de scoring ne démarrent qu'une fois la base et le modèle prêts.
+    """
+    loader = None
+    if PRELOAD_IN_BACKGROUND:
+        loader = asyncio.create_task(load_in_background())
+    else:
+        load_resources()
+    inference_executor.start()  # pool de calcul des prédictions
+    login_executor.start()      # pool de vérification des mots de passe
+    if JOBS_RUNNER and loader is None:
+        job_runner.start()      # tâches de scoring en arrière-plan (POST /jobs)
+    watcher = asyncio.create_task(watch_model(MODEL_WATCH_INTERVAL)) if MODEL_WATCH_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await watcher
+    if loader is not None:
+        with suppress(Exception):   # erreur déjà enregistrée dans startup_state
+            await loader
+    await job_runner.stop()
+    inference_executor.shutdown()
+    if startup_state.ready:
+        from app.explain import explain_executor
+        explain_executor.shutdown()
+    login_executor.shutdown()
 
 
 # Créer l'application FastAPI
 app = FastAPI(
     title="API de Prédiction de Films",
     description="API pour prédire la popularité des films pour le cinéma 'New is always better'",
-    version="0.1"
+    version="0.1",
+    lifespan=lifespan
 )
 
 # Configuration CORS
@@ -19,12 +193,29 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)   # compteurs de requêtes par route et code de retour
 
 # Inclure les routes
 app.include_router(route_auth.router, tags=["Authentification"])
-app.include_router(route_prediction.router, tags=["Prédictions"])
+app.include_router(route_prediction.router, tags=["Prédictions"], dependencies=[Depends(require_ready)])
+app.include_router(route_jobs.router, prefix="/jobs", tags=["Tâches"], dependencies=[Depends(require_ready)])
 app.include_router(route_admin.router, prefix="/admin", tags=["Administration"])
 
+# Métriques au format Prometheus (propres à chaque worker)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not registry.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Métriques désactivées (METRICS_ENABLED)")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Disponibilité (sonde de readiness) : 503 tant que le modèle et les tables de niveaux ne sont pas chargés
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    info = startup_state.info()
+    return JSONResponse(info, status_code=status.HTTP_200_OK if info["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
 # Route racine
 @app.get("/")
 async def root():
@@ -33,6 +224,7 @@ async def root():
         "documentation": "/docs",
         "routes": {
             "prédictions": "/predictions",
+            "tâches": "/jobs",
             "administration": "/admin",
             "authentification": "/auth"
         }
@@ -0,0 +1,274 @@
+# Mesures internes de l'application (histogrammes, compteurs) et export au format texte Prometheus
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+STAGE_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif minimal (compteurs par borne supérieure, somme et nombre d'observations).
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)  # dernière case : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+    def exposition(self, name: str, labels: str = "", scale: float = 1.0) -> list[str]:
+        """
+        Retourne les lignes Prometheus (_bucket cumulés, _sum, _count) de l'histogramme.
+
+        Args:
+            name (str): Nom de la métrique.
+            labels (str): Étiquettes déjà formatées (ex. 'stage="predict"'), ajoutées à chaque ligne.
+            scale (float): Facteur appliqué aux bornes et à la somme (ex. 0.001 pour exporter des ms en secondes).
+        """
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        prefix = f"{labels}," if labels else ""
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (None,), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound is None else format_value(bound * scale)
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {format_value(total * scale)}")
+        lines.append(f"{name}_count{suffix} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Compteur par combinaison d'étiquettes.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def exposition(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(values.items()):
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}{{{labels}}} {format_value(value)}" if labels else f"{self.name} {format_value(value)}")
+        return lines
+
+
+class HistogramFamily:
+    """
+    Histogrammes de même nom, un par combinaison d'étiquettes (ex. une étape de calcul).
+    """
+
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._children: dict[tuple, Histogram] = {}
+
+    def child(self, *label_values: str) -> Histogram:
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *label_values: str) -> None:
+        self.child(*label_values).observe(value)
+
+    def exposition(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, child in sorted(self._children.items()):
+            lines.extend(child.exposition(self.name, format_labels(self.labels, label_values)))
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class MetricsRegistry:
+    """
+    Ensemble des métriques de l'application, rendues au format texte Prometheus par render().
+
+    Note:
+        - Quand enabled est False, les timers et compteurs ne font rien (un appel de fonction par mesure)
+        - Les valeurs sont propres au processus : en mode pré-forké, chaque worker expose les siennes
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        counter = Counter(name, help, labels)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, help: str, buckets: tuple = STAGE_BUCKETS_S, labels: tuple = ()) -> HistogramFamily:
+        family = HistogramFamily(name, help, buckets, labels)
+        self._metrics.append(family)
+        return family
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """
+        Ajoute une fonction qui produit des lignes Prometheus au moment de l'export
+        (état lu ailleurs : pool de connexions, cache, micro-batcher...).
+        """
+        self._collectors.append(collector)
+
+    def time(self, family: HistogramFamily, *label_values: str):
+        """
+        Retourne un context manager qui mesure la durée du bloc (en secondes) dans family.
+        """
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(family.child(*label_values))
+
+    def inc(self, counter: Counter, *label_values: str, amount: float = 1) -> None:
+        if self.enabled:
+            counter.inc(*label_values, amount=amount)
+
+    def observe(self, family: HistogramFamily, value: float, *label_values: str) -> None:
+        if self.enabled:
+            family.observe(value, *label_values)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.exposition())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def gauge(name: str, help: str, value: float, labels: Optional[str] = None, kind: str = "gauge") -> list[str]:
+    """
+    Retourne les lignes Prometheus d'une valeur lue au moment de l'export
+    (kind="counter" pour un total tenu ailleurs, ex. succès du cache).
+    """
+    sample = f"{name}{{{labels}}}" if labels else name
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{sample} {format_value(value)}"]
+
+
+def histogram_lines(name: str, help: str, histogram: Histogram, scale: float = 1.0) -> list[str]:
+    """
+    Retourne les lignes Prometheus d'un Histogram existant (ex. tenu par le micro-batcher).
+    """
+    return [f"# HELP {name} {help}", f"# TYPE {name} histogram", *histogram.exposition(name, scale=scale)]
+
+
+registry = MetricsRegistry()
+
+# Durée des étapes d'une prédiction et de l'authentification
+stage_seconds = registry.histogram(
+    "movies_stage_duration_seconds", "Durée des étapes de calcul (prédiction, authentification)", labels=("stage",))
+# Requêtes HTTP par route et code de retour
+http_requests = registry.counter(
+    "movies_http_requests_total", "Requêtes HTTP traitées", labels=("method", "route", "status"))
+http_seconds = registry.histogram(
+    "movies_http_request_duration_seconds", "Durée des requêtes HTTP", labels=("method", "route"))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI qui compte les requêtes par route (modèle de chemin, ex. /predictions/{film_id}) et code de retour.
+
+    Note:
+        Middleware ASGI pur plutôt que BaseHTTPMiddleware : pas de tâche supplémentaire par requête
+        et les réponses en flux (StreamingResponse) ne sont pas mises en mémoire.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")     # modèle de chemin : pas une série par identifiant
+            http_requests.inc(scope["method"], path, str(status_code))
+            http_seconds.observe(time.perf_counter() - start, scope["method"], path)
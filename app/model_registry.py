@@ -0,0 +1,221 @@
+# Registre du modèle CatBoost : chargement unique, préchauffage et rechargement à chaud
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from app.metrics import registry, stage_seconds
+
+
+NATIVE_MODEL_PATH = "app/catboostmodel.cbm"   # produit par python -m app.native_model
+PICKLE_MODEL_PATH = "app/catboostmodel.pkl"
+MODEL_PATH = os.getenv("MODEL_PATH")     # non renseigné : le .cbm s'il existe, sinon le pickle (réévalué à chaque vérification)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))  # en secondes, 0 = surveillance désactivée
+
+logger = logging.getLogger(__name__)
+
+
+def default_model_path() -> str:
+    return NATIVE_MODEL_PATH if os.path.exists(NATIVE_MODEL_PATH) else PICKLE_MODEL_PATH
+
+
+def model_files(path: str) -> list[str]:
+    """
+    Fichiers qui composent le modèle : le fichier lui-même et, pour un .cbm, son manifeste.
+    """
+    if not path.endswith(".cbm"):
+        return [path]
+    from app.native_model import manifest_path
+    return [path, manifest_path(path)]
+
+
+def files_stat(paths: list[str]) -> tuple:
+    stats = [(path, os.stat(path)) for path in paths]
+    return tuple((path, st.st_mtime, st.st_size) for path, st in stats)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """
+    Modèle chargé en mémoire avec les informations permettant de détecter un changement sur disque.
+
+    Attributes:
+        model (Any): Pipeline scikit-learn / CatBoost désérialisé, ou NativeModel pour un .cbm.
+        version (str): Empreinte SHA-256 (tronquée) du fichier (et du manifeste pour un .cbm).
+        path (str): Chemin du fichier chargé.
+        stat (tuple): (chemin, date de modification, taille) de chaque fichier lu (modèle et manifeste).
+        loaded_at (datetime): Date du chargement.
+    """
+    model: Any
+    version: str
+    path: str
+    stat: tuple
+    loaded_at: datetime
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+class ModelRegistry:
+    """
+    Conserve une instance unique du modèle par processus.
+
+    Note:
+        - Le modèle courant est remplacé par une simple affectation : les requêtes en cours
+          gardent leur référence à l'ancien modèle et se terminent normalement.
+        - Le nouveau modèle est préchauffé avant d'être publié.
+        - Un chemin en .cbm est chargé au format natif CatBoost avec son manifeste, sans pickle.
+        - Sans chemin imposé, le .cbm est utilisé dès qu'il existe, sinon le pickle : un pickle plus
+          récent que le .cbm est signalé, il faut le réexporter (python -m app.native_model).
+    """
+
+    def __init__(self, path: Optional[str] = MODEL_PATH):
+        self._path = path
+        self._current: Optional[LoadedModel] = None
+        self._warm_up: Optional[Callable[[Any], None]] = None
+        self._seen_stat: Optional[tuple] = None  # fichiers examinés lors de la dernière vérification
+        self._warned_pickle: Optional[float] = None     # date du pickle déjà signalé
+        self._lock = threading.Lock()   # un seul chargement à la fois
+
+    @property
+    def path(self) -> str:
+        return self._path or default_model_path()
+
+    @property
+    def current(self) -> LoadedModel:
+        """
+        Retourne le modèle publié, en le chargeant au premier appel si besoin.
+        """
+        loaded = self._current
+        if loaded is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._read()
+                loaded = self._current
+        return loaded
+
+    @property
+    def model(self) -> Any:
+        return self.current.model
+
+    def load(self, warm_up: Optional[Callable[[Any], None]] = None) -> LoadedModel:
+        """
+        Charge (ou recharge) le modèle depuis le disque, le préchauffe puis le publie.
+
+        Args:
+            warm_up (Callable, optional): Fonction appelée avec le modèle avant publication,
+                mémorisée pour les rechargements suivants.
+
+        Returns:
+            LoadedModel: Modèle publié.
+        """
+        with self._lock:
+            if warm_up is not None:
+                self._warm_up = warm_up
+            with registry.time(stage_seconds, "model_load"):
+                loaded = self._read()
+            if self._warm_up is not None:
+                with registry.time(stage_seconds, "model_warm_up"):
+                    self._warm_up(loaded.model)
+            self._current = loaded
+            return loaded
+
+    def ensure_loaded(self, warm_up: Optional[Callable[[Any], None]] = None) -> LoadedModel:
+        """
+        Charge le modèle seulement s'il ne l'est pas déjà.
+
+        Note:
+            En mode pré-forké, le modèle est chargé par le processus parent avant fork :
+            les workers le réutilisent (pages partagées en copie sur écriture) au lieu de le relire.
+        """
+        with self._lock:
+            if warm_up is not None:
+                self._warm_up = warm_up
+            loaded = self._current
+        return loaded if loaded is not None else self.load()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recharge le modèle si le fichier a changé sur disque.
+
+        Returns:
+            bool: True si un nouveau modèle a été publié.
+
+        Note:
+            - La date de modification et la taille du modèle et de son manifeste servent de filtre rapide,
+              l'empreinte SHA-256 confirme le changement
+            - Un .cbm apparu depuis le chargement (export du pickle) est pris en compte
+        """
+        current = self._current
+        path = self.path
+        stat = files_stat(model_files(path))
+        self._warn_if_pickle_newer(path)
+        if current is not None and stat in (current.stat, self._seen_stat):
+            return False
+        version = self._checksum(*self._read_files(path))
+        self._seen_stat = stat
+        if current is not None and version == current.version:
+            return False
+        self.load()
+        return True
+
+    def _warn_if_pickle_newer(self, path: str) -> None:
+        """
+        Signale (une fois par version du pickle) un catboostmodel.pkl plus récent que le .cbm en service.
+        """
+        if self._path is not None or path != NATIVE_MODEL_PATH:
+            return
+        try:
+            pickle_mtime = os.stat(PICKLE_MODEL_PATH).st_mtime
+        except FileNotFoundError:
+            return
+        if pickle_mtime > os.stat(path).st_mtime and pickle_mtime != self._warned_pickle:
+            self._warned_pickle = pickle_mtime
+            logger.warning("%s est plus récent que %s et n'est pas chargé : exportez-le avec python -m app.native_model",
+                           PICKLE_MODEL_PATH, path)
+
+    @staticmethod
+    def _read_files(path: str) -> tuple[bytes, Optional[bytes]]:
+        """
+        Lit le fichier du modèle et, pour un .cbm, son manifeste.
+        """
+        files = model_files(path)
+        with open(files[0], "rb") as f:
+            blob = f.read()
+        if len(files) == 1:
+            return blob, None
+        with open(files[1], "rb") as f:
+            return blob, f.read()
+
+    @staticmethod
+    def _checksum(blob: bytes, manifest_blob: Optional[bytes]) -> str:
+        return hashlib.sha256(blob + (manifest_blob or b"")).hexdigest()[:12]
+
+    def _read(self) -> LoadedModel:
+        path = self.path
+        stat = files_stat(model_files(path))
+        self._warn_if_pickle_newer(path)
+        blob, manifest_blob = self._read_files(path)
+        if manifest_blob is not None:
+            from app.native_model import NativeModel   # importe catboost seulement pour le format natif
+            model = NativeModel.from_bytes(blob, manifest_blob)
+        else:
+            model = pickle.loads(blob)
+        return LoadedModel(
+            model=model,
+            version=self._checksum(blob, manifest_blob),
+            path=path,
+            stat=stat,
+            loaded_at=datetime.now(timezone.utc),
+        )
+
+
+model_registry = ModelRegistry()
@@ -1,6 +1,6 @@
 from typing import Optional
-from datetime import datetime
-from sqlmodel import Field, SQLModel, Column, String
+from datetime import date, datetime
+from sqlmodel import Field, SQLModel, Column, String, Text, Index
 
 
 
@@ -10,3 +10,58 @@ class Users(SQLModel, table=True):
     email: str = Field(sa_column=Column(String(255), unique=True))
     hashed_password: str = Field(sa_column=Column(String(255)))
     is_admin: bool = Field(default=0)
+
+
+class Predictions(SQLModel, table=True):
+    """
+    Historique des prédictions : une ligne par film, semaine et version du modèle.
+    """
+    __table_args__ = (
+        Index("ix_predictions_film_week_version", "film_key", "week", "model_version", unique=True),
+        Index("ix_predictions_week_version_prediction", "week", "model_version", "prediction"),   # top de la semaine
+    )
+
+    id : Optional[int] = Field(default=None, primary_key=True)
+    film_key : str = Field(sa_column=Column(String(32), nullable=False))
+    week : date = Field(description="Premier jour de la semaine de prédiction (voir CINEMA_WEEK_START)")
+    model_version : str = Field(sa_column=Column(String(32), nullable=False))
+    title : Optional[str] = Field(default=None, sa_column=Column(String(255)))
+    prediction : float
+    movie : str = Field(sa_column=Column(Text, nullable=False))     # film reçu, en JSON
+    created_at : datetime
+
+
+class WeeklyTop(SQLModel, table=True):
+    """
+    Meilleures prédictions de chaque semaine, recalculées après chaque lot enregistré.
+    """
+    week : date = Field(primary_key=True)
+    model_version : str = Field(sa_column=Column(String(32), primary_key=True))
+    position : int = Field(primary_key=True)    # 1 = meilleure prédiction
+    prediction_id : int
+    film_key : str = Field(sa_column=Column(String(32), nullable=False))
+    title : Optional[str] = Field(default=None, sa_column=Column(String(255)))
+    prediction : float
+
+
+class ScoringJobs(SQLModel, table=True):
+    """
+    Tâches de scoring de catalogues complets (POST /jobs), partagées par tous les workers.
+    """
+    __table_args__ = (
+        Index("ix_scoring_jobs_status_created", "status", "created_at"),     # prochaine tâche en attente
+    )
+
+    id : str = Field(sa_column=Column(String(32), primary_key=True))
+    status : str = Field(sa_column=Column(String(16), nullable=False))     # pending, running, done, failed
+    owner_id : Optional[int] = None
+    chunk_size : int
+    total : int                     # films du catalogue (lignes non vides)
+    processed : int = 0             # films lus, valides ou non
+    rejected : int = 0              # films invalides
+    model_version : Optional[str] = Field(default=None, sa_column=Column(String(32)))
+    error : Optional[str] = Field(default=None, sa_column=Column(Text))
+    claim_token : Optional[str] = Field(default=None, sa_column=Column(String(32)))    # réservation en cours
+    created_at : datetime
+    updated_at : datetime           # dernier paquet traité : une tâche "running" inactive est reprise
+    finished_at : Optional[datetime] = None
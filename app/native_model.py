@@ -0,0 +1,200 @@
+# Modèle CatBoost au format natif (.cbm) et prétraitement décrit par un manifeste JSON
+#
+# Export : python -m app.native_model [modele.pkl] [modele.cbm] [--onnx]
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+
+
+MANIFEST_SUFFIX = ".json"   # manifeste écrit à côté du .cbm (même nom, extension .json)
+
+
+def manifest_path(cbm_path: str) -> str:
+    return os.path.splitext(cbm_path)[0] + MANIFEST_SUFFIX
+
+
+class NativeModel:
+    """
+    Équivalent du pipeline scikit-learn (ColumnTransformer + CatBoostRegressor) sans pickle.
+
+    Le prétraitement (one-hot, RobustScaler, OrdinalEncoder) est rejoué en NumPy à partir
+    des paramètres du manifeste, puis CatBoost prédit sur un Pool construit directement
+    depuis la matrice obtenue.
+
+    Attributes:
+        regressor (CatBoostRegressor): Modèle chargé depuis le .cbm.
+        manifest (dict): Ordre des variables, indices des variables catégorielles et paramètres du prétraitement.
+    """
+
+    def __init__(self, regressor: CatBoostRegressor, manifest: dict):
+        self.regressor = regressor
+        self.manifest = manifest
+        self.feature_names_in_ = np.array(manifest["feature_order"], dtype=object)
+        self._steps = manifest["preprocessing"]
+        self._indexes = {   # index pandas des catégories, pour un encodage par table de hachage
+            (step["kind"], column): pd.Index(categories)
+            for step in self._steps if "categories" in step
+            for column, categories in zip(step["columns"], step["categories"])
+        }
+
+    @classmethod
+    def load(cls, cbm_path: str) -> "NativeModel":
+        """
+        Charge un modèle exporté par export_native_model.
+
+        Args:
+            cbm_path (str): Chemin du fichier .cbm (le manifeste est lu à côté).
+
+        Returns:
+            NativeModel: Modèle prêt à prédire.
+        """
+        with open(cbm_path, "rb") as f:
+            cbm_blob = f.read()
+        with open(manifest_path(cbm_path), "rb") as f:
+            manifest_blob = f.read()
+        return cls.from_bytes(cbm_blob, manifest_blob)
+
+    @classmethod
+    def from_bytes(cls, cbm_blob: bytes, manifest_blob: bytes) -> "NativeModel":
+        """
+        Construit le modèle à partir du contenu du .cbm et du manifeste déjà lus.
+        """
+        regressor = CatBoostRegressor()
+        regressor.load_model(blob=cbm_blob)
+        return cls(regressor, json.loads(manifest_blob))
+
+    def transform(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Applique le prétraitement du pipeline d'origine.
+
+        Args:
+            data (pd.DataFrame): Variables FEATURES_OF_INTEREST.
+
+        Returns:
+            np.ndarray: Matrice float32 contiguë (type interne de CatBoost, évite une conversion
+                lente à la construction du Pool), colonnes dans l'ordre de manifest["output_columns"].
+
+        Raises:
+            ValueError: Si une variable ordinale prend une valeur inconnue (comme OrdinalEncoder).
+        """
+        rows = np.arange(len(data))
+        blocks = []
+        for step in self._steps:
+            if step["kind"] == "onehot":
+                for column in step["columns"]:
+                    index = self._indexes[("onehot", column)]
+                    codes = index.get_indexer(data[column])
+                    block = np.zeros((len(data), len(index)), dtype=np.float32)
+                    known = codes >= 0      # catégorie inconnue : ligne à zéro (handle_unknown="ignore")
+                    block[rows[known], codes[known]] = 1.0
+                    blocks.append(block)
+            elif step["kind"] == "robust":
+                values = data[step["columns"]].to_numpy(dtype=np.float64)
+                blocks.append(((values - np.asarray(step["center"])) / np.asarray(step["scale"])).astype(np.float32))
+            elif step["kind"] == "ordinal":
+                for column in step["columns"]:
+                    codes = self._indexes[("ordinal", column)].get_indexer(data[column])
+                    if (codes < 0).any():
+                        raise ValueError(f"Valeur inconnue pour la variable ordinale {column}")
+                    blocks.append(codes[:, None].astype(np.float32))
+        return np.ascontiguousarray(np.hstack(blocks))
+
+    def pool(self, data: pd.DataFrame) -> Pool:
+        return Pool(self.transform(data))
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        return self.regressor.predict(self.pool(data))
+
+
+def build_manifest(pipeline) -> dict:
+    """
+    Décrit le prétraitement d'un pipeline ColumnTransformer + CatBoostRegressor.
+
+    Args:
+        pipeline (Pipeline): Pipeline scikit-learn chargé depuis le pickle.
+
+    Returns:
+        dict: Ordre des variables, variables catégorielles et paramètres de chaque transformation.
+    """
+    transformer = pipeline.steps[0][1]
+    regressor = pipeline.steps[-1][1]
+    feature_order = [str(name) for name in pipeline.feature_names_in_]
+    preprocessing, categorical_columns = [], []
+    for name, step, columns in transformer.transformers_:
+        kind = type(step).__name__
+        if name == "remainder" and (step == "drop" or len(columns) == 0):
+            continue
+        if kind == "OneHotEncoder":
+            categorical_columns = list(columns)
+            preprocessing.append({"kind": "onehot", "columns": list(columns),
+                                  "categories": [[c.item() if hasattr(c, "item") else c for c in cats] for cats in step.categories_]})
+        elif kind == "RobustScaler":
+            preprocessing.append({"kind": "robust", "columns": list(columns),
+                                  "center": step.center_.tolist(), "scale": step.scale_.tolist()})
+        elif kind == "OrdinalEncoder":
+            preprocessing.append({"kind": "ordinal", "columns": list(columns),
+                                  "categories": [[c.item() for c in cats] for cats in step.categories_]})
+        else:
+            raise ValueError(f"Transformation non prise en charge : {name} ({kind})")
+    return {
+        "feature_order": feature_order,
+        "categorical_features": categorical_columns,
+        "categorical_indices": [feature_order.index(column) for column in categorical_columns],
+        "output_columns": [str(name) for name in transformer.get_feature_names_out()],
+        "catboost_cat_feature_indices": list(regressor.get_cat_feature_indices()),
+        "preprocessing": preprocessing,
+    }
+
+
+def export_native_model(pkl_path: str, cbm_path: str, onnx: bool = False) -> dict:
+    """
+    Exporte le pipeline picklé en .cbm + manifeste JSON (et optionnellement en ONNX).
+
+    Args:
+        pkl_path (str): Pipeline d'origine (catboostmodel.pkl).
+        cbm_path (str): Fichier .cbm à écrire.
+        onnx (bool): Écrire aussi le CatBoostRegressor au format ONNX (même nom, extension .onnx).
+
+    Returns:
+        dict: Manifeste écrit.
+    """
+    with open(pkl_path, "rb") as f:
+        pipeline = pickle.load(f)
+    manifest = build_manifest(pipeline)
+    regressor = pipeline.steps[-1][1]
+    regressor.save_model(cbm_path, format="cbm")
+    if onnx:
+        regressor.save_model(os.path.splitext(cbm_path)[0] + ".onnx", format="onnx")
+    with open(manifest_path(cbm_path), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def check_export(pkl_path: str, cbm_path: str, data: pd.DataFrame) -> float:
+    """
+    Compare les prédictions du pipeline picklé et du modèle natif.
+
+    Returns:
+        float: Écart absolu maximal entre les deux.
+    """
+    with open(pkl_path, "rb") as f:
+        pipeline = pickle.load(f)
+    return float(np.max(np.abs(pipeline.predict(data) - NativeModel.load(cbm_path).predict(data))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporte catboostmodel.pkl au format natif CatBoost")
+    parser.add_argument("pkl_path", nargs="?", default="app/catboostmodel.pkl")
+    parser.add_argument("cbm_path", nargs="?", default="app/catboostmodel.cbm")
+    parser.add_argument("--onnx", action="store_true", help="exporter aussi le modèle CatBoost en ONNX")
+    args = parser.parse_args()
+    export_native_model(args.pkl_path, args.cbm_path, onnx=args.onnx)
+
+    from app.use_model import build_features, WARMUP_MOVIE    # vérification sur un film d'exemple
+    gap = check_export(args.pkl_path, args.cbm_path, build_features(pd.DataFrame.from_records([WARMUP_MOVIE])))
+    print(f"✅ Modèle exporté dans {args.cbm_path} (écart avec le pickle : {gap})")
@@ -0,0 +1,129 @@
+# Cache des prédictions, indexé par version du modèle et vecteur de variables
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 100000))   # 0 = cache désactivé
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", 3600))      # en secondes
+
+
+class PredictionCache:
+    """
+    Cache LRU avec durée de vie des prédictions, une entrée par film.
+
+    Note:
+        - La clé d'un film est l'empreinte (hash_pandas_object) de son vecteur de variables
+          exactement tel qu'il est envoyé au modèle
+        - Le cache est lié à une génération (version du modèle, version des tables de talents) :
+          il est vidé dès que l'une des deux change
+        - Partagé entre les threads du pool d'inférence, protégé par un verrou
+        - Avec width, chaque entrée est un vecteur de width valeurs (contributions SHAP, voir app.explain)
+    """
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, ttl: float = PREDICTION_CACHE_TTL,
+                 width: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.width = width
+        self.generation: Optional[tuple] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[float, Any]] = OrderedDict()   # clé -> (expiration, prédiction)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @staticmethod
+    def keys(data: pd.DataFrame) -> np.ndarray:
+        """
+        Calcule la clé de chaque ligne du DataFrame de variables.
+
+        Args:
+            data (pd.DataFrame): Variables envoyées au modèle (FEATURES_OF_INTEREST).
+
+        Returns:
+            np.ndarray: Empreintes uint64, une par ligne.
+        """
+        return pd.util.hash_pandas_object(data, index=False).to_numpy()
+
+    def get_many(self, keys: np.ndarray, generation: tuple) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche les prédictions d'un lot de films.
+
+        Args:
+            keys (np.ndarray): Clés des films.
+            generation (tuple): (version du modèle, version des tables de talents) courantes.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Prédictions trouvées (NaN si absentes) et masque des absences.
+                Avec width, les prédictions sont une matrice (une ligne par film).
+        """
+        values = np.full(len(keys) if self.width is None else (len(keys), self.width), np.nan)
+        missing = np.ones(len(keys), dtype=bool)
+        now = time.monotonic()
+        with self._lock:
+            self._bind(generation)
+            for i, key in enumerate(keys.tolist()):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = value
+                missing[i] = False
+            hits = int(len(keys) - missing.sum())
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return values, missing
+
+    def put_many(self, keys: np.ndarray, values: np.ndarray, generation: tuple) -> None:
+        """
+        Enregistre les prédictions calculées pour un lot de films.
+
+        Args:
+            keys (np.ndarray): Clés des films.
+            values (np.ndarray): Prédictions correspondantes.
+            generation (tuple): Génération ayant produit les prédictions.
+        """
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self.generation:   # le modèle a changé pendant le calcul
+                return
+            for key, value in zip(keys.tolist(), values.tolist()):
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "generation": self.generation,
+        }
+
+    def _bind(self, generation: tuple) -> None:
+        if generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+
+
+prediction_cache = PredictionCache()
@@ -0,0 +1,197 @@
+# Historique des prédictions : enregistrement par lot et lectures indexées (sans appel au modèle)
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.modeles import Predictions, WeeklyTop
+from app.schemas import MovieInput
+
+
+PREDICTION_HISTORY_ENABLED = os.getenv("PREDICTION_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+WEEKLY_TOP_SIZE = int(os.getenv("WEEKLY_TOP_SIZE", 10))         # films gardés dans le top de chaque semaine
+CINEMA_WEEK_START = int(os.getenv("CINEMA_WEEK_START", 2))      # 0 = lundi, 2 = mercredi (jour des sorties en salle)
+
+KEY_LOOKUP_CHUNK = 500      # clés par requête IN (limite de paramètres de certaines bases)
+MOVIE_FIELDS = sorted(MovieInput.model_fields)
+
+
+def film_key(movie: dict) -> str:
+    """
+    Calcule l'identifiant stable d'un film (utilisé par GET /predictions/{film_id}).
+
+    Args:
+        movie (dict): Film tel que reçu par POST /predictions.
+
+    Returns:
+        str: Empreinte SHA-256 (tronquée) du titre, de l'année et du réalisateur,
+            ou des champs du modèle si le film n'a pas de titre.
+    """
+    if movie.get("fr_title"):
+        identity = [movie.get("fr_title"), movie.get("released_year"), movie.get("directors")]
+    else:
+        identity = {field: movie.get(field) for field in MOVIE_FIELDS}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()[:16]
+
+
+def week_of(day: Optional[date] = None) -> date:
+    """
+    Retourne le premier jour (CINEMA_WEEK_START) de la semaine contenant day (aujourd'hui par défaut).
+    """
+    day = day or date.today()
+    return day - timedelta(days=(day.weekday() - CINEMA_WEEK_START) % 7)
+
+
+def persist_predictions(movies: list[dict], predictions, model_version: str, week: Optional[date] = None) -> int:
+    """
+    Enregistre un lot de prédictions en une insertion groupée puis recalcule le top de la semaine.
+
+    Args:
+        movies (list[dict]): Films prédits.
+        predictions (array-like): Prédictions, dans l'ordre de movies.
+        model_version (str): Version du modèle qui a produit les prédictions.
+        week (date, optional): Semaine de prédiction, la semaine courante par défaut.
+
+    Returns:
+        int: Nombre de prédictions ajoutées.
+
+    Note:
+        - Un film déjà prédit la même semaine avec la même version du modèle n'est pas réenregistré
+        - Exécuté en tâche de fond après la réponse (BackgroundTasks) : n'allonge pas la requête
+    """
+    week = week or week_of()
+    now = datetime.now(timezone.utc)
+    rows = {}
+    for movie, prediction in zip(movies, predictions):
+        key = film_key(movie)
+        rows[key] = {
+            "film_key": key,
+            "week": week,
+            "model_version": model_version,
+            "title": movie.get("fr_title"),
+            "prediction": float(prediction),
+            "movie": json.dumps(movie, ensure_ascii=False, default=str),
+            "created_at": now,
+        }
+    with Session(engine) as session:
+        keys = list(rows)
+        existing = set()
+        for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+            existing.update(session.exec(
+                select(Predictions.film_key).where(
+                    Predictions.week == week,
+                    Predictions.model_version == model_version,
+                    Predictions.film_key.in_(keys[start:start + KEY_LOOKUP_CHUNK]),
+                )
+            ).all())
+        new_rows = [row for key, row in rows.items() if key not in existing]
+        if not new_rows:
+            return 0
+        try:
+            session.execute(insert(Predictions), new_rows)
+            session.commit()
+        except IntegrityError:  # mêmes films enregistrés entre-temps par un autre worker : ligne par ligne
+            session.rollback()
+            for row in new_rows:
+                try:
+                    session.execute(insert(Predictions), [row])
+                    session.commit()
+                except IntegrityError:
+                    session.rollback()
+        refresh_weekly_top(session, week, model_version)
+    return len(new_rows)
+
+
+def refresh_weekly_top(session: Session, week: date, model_version: str, size: int = WEEKLY_TOP_SIZE) -> list[WeeklyTop]:
+    """
+    Recalcule le top de la semaine à partir de l'index (week, model_version, prediction).
+
+    Returns:
+        list[WeeklyTop]: Lignes écrites, par prédiction décroissante.
+    """
+    best = session.exec(
+        select(Predictions)
+        .where(Predictions.week == week, Predictions.model_version == model_version)
+        .order_by(Predictions.prediction.desc(), Predictions.id)
+        .limit(size)
+    ).all()
+    top = [
+        WeeklyTop(week=week, model_version=model_version, position=position, prediction_id=row.id,
+                  film_key=row.film_key, title=row.title, prediction=row.prediction)
+        for position, row in enumerate(best, start=1)
+    ]
+    try:
+        session.execute(delete(WeeklyTop).where(WeeklyTop.week == week, WeeklyTop.model_version == model_version))
+        session.add_all(top)
+        session.commit()
+    except IntegrityError:  # recalcul concurrent par un autre worker, qui a écrit le même top
+        session.rollback()
+    return top
+
+
+def prediction_to_dict(row: Predictions) -> dict:
+    return {
+        "id": row.id,
+        "film_key": row.film_key,
+        "title": row.title,
+        "week": row.week.isoformat(),
+        "model_version": row.model_version,
+        "prediction": row.prediction,
+        "created_at": row.created_at.isoformat(),
+        "movie": json.loads(row.movie),
+    }
+
+
+def list_predictions(session: Session, after: Optional[int] = None, limit: int = 50,
+                     week: Optional[date] = None, model_version: Optional[str] = None) -> dict:
+    """
+    Parcourt l'historique par pages, dans l'ordre d'enregistrement (pagination par clé : id > after).
+
+    Returns:
+        dict: Prédictions de la page et curseur "next_after" de la page suivante (None à la fin).
+    """
+    query = select(Predictions)
+    if after is not None:
+        query = query.where(Predictions.id > after)
+    if week is not None:
+        query = query.where(Predictions.week == week)
+    if model_version is not None:
+        query = query.where(Predictions.model_version == model_version)
+    rows = session.exec(query.order_by(Predictions.id).limit(limit + 1)).all()
+    page = rows[:limit]
+    return {
+        "items": [prediction_to_dict(row) for row in page],
+        "next_after": page[-1].id if len(rows) > limit else None,
+    }
+
+
+def film_predictions(session: Session, key: str) -> list[dict]:
+    """
+    Retourne les prédictions d'un film, de la plus récente à la plus ancienne.
+    """
+    rows = session.exec(
+        select(Predictions).where(Predictions.film_key == key).order_by(Predictions.week.desc(), Predictions.id.desc())
+    ).all()
+    return [prediction_to_dict(row) for row in rows]
+
+
+def weekly_top(session: Session, week: date, model_version: str) -> list[dict]:
+    """
+    Lit le top précalculé d'une semaine.
+    """
+    rows = session.exec(
+        select(WeeklyTop)
+        .where(WeeklyTop.week == week, WeeklyTop.model_version == model_version)
+        .order_by(WeeklyTop.position)
+    ).all()
+    return [
+        {"position": row.position, "film_key": row.film_key, "title": row.title,
+         "prediction": row.prediction, "prediction_id": row.prediction_id}
+        for row in rows
+    ]
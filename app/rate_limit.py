@@ -0,0 +1,94 @@
+# Limitation des tentatives de connexion
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+class FailureLimiter:
+    """
+    Compte les échecs par clé sur une fenêtre glissante et bloque au-delà d'un seuil.
+
+    Note:
+        - Utilisé uniquement depuis la boucle d'événements : pas de verrou nécessaire
+        - Les clés sont rangées par dernier échec (la plus ancienne en tête) : les clés expirées
+          sont purgées depuis la tête, sans parcourir les autres
+        - Au-delà de max_keys clés actives, celle dont le dernier échec est le plus ancien est oubliée
+    """
+
+    def __init__(self, max_failures: int, window: float, max_keys: int = 10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._failures: OrderedDict[str, deque] = OrderedDict()
+
+    def retry_after(self, key: str) -> Optional[float]:
+        """
+        Retourne le délai (en secondes) avant la prochaine tentative autorisée, ou None si la clé n'est pas bloquée.
+        """
+        failures = self._recent(key)
+        if failures is None or len(failures) < self.max_failures:
+            return None
+        return failures[0] + self.window - time.monotonic()
+
+    def record_failure(self, key: str) -> None:
+        now = time.monotonic()
+        self._failures.setdefault(key, deque(maxlen=self.max_failures)).append(now)
+        self._failures.move_to_end(key)
+        horizon = now - self.window
+        while self._failures:   # purge des clés dont le dernier échec a expiré
+            oldest = next(iter(self._failures))
+            if self._failures[oldest][-1] >= horizon:
+                break
+            del self._failures[oldest]
+        while len(self._failures) > self.max_keys:
+            self._failures.popitem(last=False)
+
+    def reset(self, key: str) -> None:
+        self._failures.pop(key, None)
+
+    def _recent(self, key: str) -> Optional[deque]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        horizon = time.monotonic() - self.window
+        while failures and failures[0] < horizon:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+
+class LoginRateLimiter:
+    """
+    Limite les échecs de connexion par nom d'utilisateur et par adresse IP,
+    pour ne pas dépenser de calcul bcrypt sur une attaque par force brute.
+    """
+
+    def __init__(self, max_failures_per_user: int, max_failures_per_ip: int, window: float, max_keys: int = 10000):
+        self.by_user = FailureLimiter(max_failures_per_user, window, max_keys)
+        self.by_ip = FailureLimiter(max_failures_per_ip, window, max_keys)
+
+    def check(self, username: str, ip: str) -> None:
+        """
+        Refuse la tentative si l'utilisateur ou l'adresse IP a trop d'échecs récents.
+
+        Raises:
+            HTTPException: 429 avec un en-tête Retry-After.
+        """
+        delays = [d for d in (self.by_user.retry_after(username.lower()), self.by_ip.retry_after(ip)) if d is not None]
+        if delays:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Trop de tentatives de connexion, veuillez réessayer plus tard",
+                headers={"Retry-After": str(max(1, int(max(delays)) + 1))},
+            )
+
+    def record_failure(self, username: str, ip: str) -> None:
+        self.by_user.record_failure(username.lower())
+        self.by_ip.record_failure(ip)
+
+    def record_success(self, username: str) -> None:
+        self.by_user.reset(username.lower())
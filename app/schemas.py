@@ -1,6 +1,9 @@
 # Schémas Pydantic pour les formulaires de l'API
-from pydantic import BaseModel, Field, EmailStr
-from typing import Union
+from datetime import date, datetime
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, TypeAdapter, ValidationError, field_validator
+from typing import Optional, Union
+
+DATE_FORMAT = "%d/%m/%Y"
 
 
 class CreateUserRequest(BaseModel):
@@ -17,5 +20,108 @@ class CreateUserRequest(BaseModel):
                 "email": "mon_email@domaine.com",
                 "password": "azerty12",
             }
-        }        
-        
\ No newline at end of file
+        }
+
+
+class MovieInput(BaseModel):
+    """
+    Film à prédire, validé avant tout calcul.
+
+    Note:
+        - Types stricts : pas de conversion implicite ("2019" n'est pas une année valide)
+        - released_date est lue au format jj/mm/aaaa, espaces autour ignorés ("  28/02/2018")
+        - Les autres champs (fr_title, budget...) sont acceptés mais ignorés : les routes renvoient
+          le film reçu tel quel avec sa prédiction
+    """
+    model_config = ConfigDict(strict=True, extra="ignore")
+
+    released_year: int = Field(..., ge=1888, le=2100, description="Année de sortie")
+    duration_minutes: int = Field(..., gt=0, description="Durée en minutes")
+    country: str = Field(..., description="Pays de production")
+    category: str = Field(..., description="Genre")
+    classification: str = Field(..., description="Classification (ex. Tout public)")
+    released_date: Optional[date] = Field(default=None, description="Date de sortie, jj/mm/aaaa")
+    directors: Optional[str] = None
+    writer: Optional[str] = None
+    distribution: Optional[str] = None
+    actor_1: Optional[str] = None
+    actor_2: Optional[str] = None
+    actor_3: Optional[str] = None
+
+    @field_validator("released_date", mode="before")
+    @classmethod
+    def parse_released_date(cls, value):
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                return None
+            try:
+                return datetime.strptime(value, DATE_FORMAT).date()
+            except ValueError:
+                raise ValueError(f"Date attendue au format jj/mm/aaaa : {value!r}")
+        return value
+
+
+class BoxOfficeRecord(BaseModel):
+    """
+    Résultat d'un film au box-office, ajouté aux niveaux de talents (POST /admin/box-office).
+
+    Note:
+        Un nom absent (None) n'est pas compté, comme une valeur manquante du jeu de données.
+    """
+    model_config = ConfigDict(strict=True, extra="ignore")
+
+    weekly_entrances: int = Field(..., ge=0, description="Entrées hebdomadaires du film")
+    fr_title: Optional[str] = None
+    released_year: Optional[int] = None
+    directors: Optional[str] = None
+    writer: Optional[str] = None
+    distribution: Optional[str] = None
+    actor_1: Optional[str] = None
+    actor_2: Optional[str] = None
+    actor_3: Optional[str] = None
+
+
+movie_list_adapter = TypeAdapter(list[MovieInput])
+box_office_list_adapter = TypeAdapter(list[BoxOfficeRecord])
+
+
+def validate_rows(adapter: TypeAdapter, rows: list) -> tuple[list, list[int], list[dict]]:
+    """
+    Valide un lot de lignes en un seul appel, sans rejeter tout le lot pour une ligne invalide.
+
+    Args:
+        adapter (TypeAdapter): Adaptateur d'une liste de modèles (ex. movie_list_adapter).
+        rows (list): Lignes reçues (dictionnaires).
+
+    Returns:
+        tuple:
+            - list: Lignes valides, converties en modèles
+            - list[int]: Position de chaque ligne valide dans rows
+            - list[dict]: Une entrée {"index", "errors"} par ligne rejetée
+
+    Note:
+        Le lot entier est validé d'un coup ; les lignes valides ne sont revalidées
+        séparément que si au moins une ligne est en erreur.
+    """
+    try:
+        return adapter.validate_python(rows), list(range(len(rows))), []
+    except ValidationError as e:
+        rejected: dict[int, list[dict]] = {}
+        for error in e.errors(include_url=False):
+            index, *field = error["loc"]
+            rejected.setdefault(index, []).append({
+                "field": ".".join(str(part) for part in field) or None,
+                "message": error["msg"],
+            })
+    valid = [i for i in range(len(rows)) if i not in rejected]
+    items = adapter.validate_python([rows[i] for i in valid])
+    errors = [{"index": index, "errors": rejected[index]} for index in sorted(rejected)]
+    return items, valid, errors
+
+
+def validate_movies(rows: list) -> tuple[list[MovieInput], list[int], list[dict]]:
+    """
+    Valide un lot de films à prédire (voir validate_rows).
+    """
+    return validate_rows(movie_list_adapter, rows)
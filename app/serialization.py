@@ -0,0 +1,129 @@
+# Sérialisation des prédictions (orjson) et compression des réponses (gzip, brotli)
+import os
+import zlib
+from typing import AsyncIterator, Optional, Sequence
+
+import brotli
+import orjson
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))    # en octets, réponses plus petites non compressées
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))    # 0 à 11 : 4 reste plus rapide que gzip -6 à taille égale
+
+ENCODINGS = ("br", "gzip")      # par ordre de préférence
+
+
+def dumps(content) -> bytes:
+    """
+    Sérialise en JSON sans passer par jsonable_encoder.
+
+    Note:
+        - Les tableaux et scalaires NumPy sont écrits directement, NaN devient null
+        - Les types non pris en charge par orjson (Timestamp pandas...) sont écrits avec str
+    """
+    return orjson.dumps(content, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def dump_line(record: dict) -> bytes:
+    return dumps(record) + b"\n"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    Lit le paramètre fields (noms séparés par des virgules), None s'il est absent ou vide.
+    """
+    names = tuple(name.strip() for name in (fields or "").split(",") if name.strip())
+    return names or None
+
+
+def prediction_records(movies: Sequence[dict], predictions, fields: Optional[tuple[str, ...]] = None) -> list[dict]:
+    """
+    Associe chaque film à sa prédiction, sans passer par un DataFrame.
+
+    Args:
+        movies (Sequence[dict]): Films tels que reçus.
+        predictions (array-like): Prédictions, dans l'ordre de movies.
+        fields (tuple[str, ...], optional): Champs des films à renvoyer (tous par défaut) ;
+            'prediction' est toujours renvoyé.
+
+    Returns:
+        list[dict]: Un dictionnaire par film, complété de 'prediction'.
+    """
+    values = predictions.tolist() if hasattr(predictions, "tolist") else list(predictions)
+    if fields is None:
+        return [{**movie, "prediction": value} for movie, value in zip(movies, values)]
+    return [
+        {**{name: movie[name] for name in fields if name in movie}, "prediction": value}
+        for movie, value in zip(movies, values)
+    ]
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """
+    Choisit la compression d'après l'en-tête Accept-Encoding (brotli de préférence, puis gzip).
+
+    Returns:
+        str | None: "br", "gzip" ou None (réponse non compressée).
+    """
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    candidates = [encoding for encoding in ENCODINGS if accepted.get(encoding, accepted.get("*", 0.0)) > 0]
+    return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)), default=None)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return zlib.compress(body, GZIP_LEVEL, wbits=31)    # wbits=31 : format gzip
+
+
+def json_response(request: Request, content, status_code: int = 200) -> Response:
+    """
+    Réponse JSON sérialisée par orjson, compressée si le client l'accepte et si elle dépasse COMPRESSION_MIN_SIZE.
+    """
+    body = dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request) if len(body) >= COMPRESSION_MIN_SIZE else None
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """
+    Compresse un flux au fil de l'eau ; chaque morceau est vidé aussitôt pour que le client le reçoive sans attendre.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        async for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        async for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def ndjson_response(request: Request, chunks: AsyncIterator[bytes]) -> StreamingResponse:
+    """
+    Réponse NDJSON en flux, compressée si le client l'accepte.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request)
+    if encoding is not None:
+        chunks = compress_stream(chunks, encoding)
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
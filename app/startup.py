@@ -0,0 +1,131 @@
+# Démarrage de l'application : durée de chaque étape, disponibilité et profil des imports
+#
+# Rapport : python -m app.startup [--top 15] [--json]
+# (base SQLite en mémoire pour l'étape init_db, sauf DATABASE_URL explicite : aucun fichier n'est créé)
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from fastapi import HTTPException, status
+
+
+class StartupState:
+    """
+    Étapes du démarrage déjà exécutées par ce processus et leur durée.
+
+    Note:
+        - ready passe à True quand le modèle et les tables de niveaux sont chargés (GET /ready)
+        - Les durées sont en millisecondes, dans l'ordre d'exécution des étapes
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def info(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "phases_ms": dict(self.phases)}
+
+
+startup_state = StartupState()
+
+
+def require_ready() -> None:
+    """
+    Dépendance des routes qui utilisent le modèle ou la base : 503 tant que le chargement n'est pas terminé.
+
+    Raises:
+        HTTPException: 503 avec un en-tête Retry-After (chargement en cours ou en échec, voir GET /ready).
+    """
+    if not startup_state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service en cours de démarrage, réessayez plus tard",
+            headers={"Retry-After": "5"},
+        )
+
+
+def import_profile(module: str = "app.main") -> list[dict]:
+    """
+    Mesure le temps d'import d'un module dans un processus neuf (python -X importtime).
+
+    Args:
+        module (str): Module à importer.
+
+    Returns:
+        list[dict]: Un élément par paquet de premier niveau ("package", "self_ms", "modules"),
+            par temps décroissant ; le temps propre de chaque module est attribué à son paquet.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import impossible")
+    self_us: dict[str, int] = defaultdict(int)
+    modules: dict[str, int] = defaultdict(int)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        self_us[package] += int(own)
+        modules[package] += 1
+    return [
+        {"package": package, "self_ms": round(us / 1000, 1), "modules": modules[package]}
+        for package, us in sorted(self_us.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+def startup_report(top: int = 15) -> dict:
+    """
+    Profile le démarrage : imports de app.main, puis chargement des ressources (preload).
+
+    Returns:
+        dict: Temps d'import par paquet ("imports", les top plus lents), total des imports
+            et durée de chaque étape du chargement ("phases_ms").
+    """
+    from app.startup import startup_state as state     # celui de app.main, même si ce module est __main__
+
+    profile = import_profile()
+    with state.phase("import app.main"):
+        from app.main import preload
+    preload()
+    return {
+        "imports": profile[:top],
+        "imports_total_ms": round(sum(item["self_ms"] for item in profile), 1),
+        "phases_ms": dict(state.phases),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profil du démarrage de l'API (imports et chargement des ressources).")
+    parser.add_argument("--top", type=int, default=15, help="nombre de paquets affichés")
+    parser.add_argument("--json", action="store_true", help="rapport au format JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    report = startup_report(args.top)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"Imports de app.main : {report['imports_total_ms']} ms")
+        for item in report["imports"]:
+            print(f"  {item['package']:<24} {item['self_ms']:>9.1f} ms  ({item['modules']} modules)")
+        print("Chargement des ressources :")
+        for name, ms in report["phases_ms"].items():
+            print(f"  {name:<24} {ms:>9.1f} ms")
@@ -1,35 +1,63 @@
 # gestion des tokens
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 import os
-from dotenv import load_dotenv, find_dotenv
 from passlib.context import CryptContext
 from app.database import Session, db_connection
 from jose import JWTError, jwt
 from app.modeles import Users
 from fastapi.security import OAuth2PasswordBearer
+from app.inference import InferenceExecutor
+from app.metrics import registry, stage_seconds
+from app.rate_limit import LoginRateLimiter
 
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])   # pour les routes d'authentification
 
-dot_env_path = find_dotenv()
-load_dotenv(dotenv_path=dot_env_path, override=True)
-
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM","HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
-
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto") # pour hasher le mot de passe 
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))    # tokens déjà vérifiés gardés en mémoire
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))         # en secondes, 0 = pas de cache utilisateur
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))             # coût bcrypt, les anciens hashs sont mis à jour à la connexion
+LOGIN_WORKERS = int(os.getenv("LOGIN_WORKERS", 2))              # vérifications bcrypt simultanées
+LOGIN_QUEUE_SIZE = int(os.getenv("LOGIN_QUEUE_SIZE", 16))
+LOGIN_TIMEOUT = float(os.getenv("LOGIN_TIMEOUT", 10))           # en secondes
+LOGIN_MAX_FAILURES_PER_USER = int(os.getenv("LOGIN_MAX_FAILURES_PER_USER", 5))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", 20))
+LOGIN_FAILURE_WINDOW = float(os.getenv("LOGIN_FAILURE_WINDOW", 300))  # en secondes
+LOGIN_MAX_TRACKED_KEYS = int(os.getenv("LOGIN_MAX_TRACKED_KEYS", 100000))  # utilisateurs / adresses IP suivis au plus
+
+bcrypt_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,   # un hash d'un autre coût est considéré à mettre à jour
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+) # pour hasher le mot de passe 
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="login")  # pour obtenir le token d'accès à l'API  
 
 
 
 db_dependency = Annotated[Session, Depends(db_connection)]   # dépendance pour la connexion à la BDD
 
+# pool dédié aux vérifications bcrypt, pour ne pas saturer le pool de threads de FastAPI
+login_executor = InferenceExecutor(kind="thread", workers=LOGIN_WORKERS, queue_size=LOGIN_QUEUE_SIZE,
+                                   timeout=LOGIN_TIMEOUT, name="connexion")
+login_limiter = LoginRateLimiter(LOGIN_MAX_FAILURES_PER_USER, LOGIN_MAX_FAILURES_PER_IP, LOGIN_FAILURE_WINDOW,
+                                 LOGIN_MAX_TRACKED_KEYS)
+
+_token_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()  # token -> (email, expiration du token)
+_user_cache: dict[str, tuple[float, Users]] = {}                    # email -> (fin de validité, utilisateur)
+_cache_lock = threading.Lock()
+
 def create_access_token(data: dict, expires_delta : timedelta = None) -> str:
     """
     Crée un token JWT d'accès.
@@ -76,16 +104,95 @@ def get_password_hash(password : str) -> str:
 def authenticate_user(username: str, password: str, db: db_dependency) -> Users:
     """
     Authentifie un utilisateur par username OU email.
+
+    Note:
+        Si le hash stocké a été calculé avec un autre coût que BCRYPT_ROUNDS,
+        il est recalculé avec le mot de passe fourni et enregistré.
     """
     user = db.query(Users).filter((Users.email == username) | (Users.username == username)).first()    
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.hashed_password):
+    with registry.time(stage_seconds, "auth_password"):
+        valid, new_hash = bcrypt_context.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        invalidate_user_cache(user.email)
     return user
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency) -> Users:
+def verify_token(token: str) -> str:
+    """
+    Vérifie la signature et l'expiration d'un token, en réutilisant les vérifications précédentes.
+
+    Args:
+        token (str): Token JWT à décoder
+
+    Returns:
+        str: Email de l'utilisateur (champ "sub")
+
+    Raises:
+        HTTPException: 401 si le token est invalide ou ne contient pas d'email
+
+    Note:
+        Un token vérifié est gardé (au plus TOKEN_CACHE_SIZE) jusqu'à son champ "exp"
+    """
+    now = time.time()
+    with _cache_lock:
+        entry = _token_cache.get(token)
+        if entry is not None:
+            if entry[1] > now:
+                _token_cache.move_to_end(token)
+                return entry[0]
+            del _token_cache[token]
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    username: str = payload.get("sub")
+    if username is None :
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    if TOKEN_CACHE_SIZE > 0 and "exp" in payload:
+        with _cache_lock:
+            _token_cache[token] = (username, float(payload["exp"]))
+            while len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+    return username
+
+
+def _cached_user(email: str) -> Optional[Users]:
+    with _cache_lock:
+        entry = _user_cache.get(email)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _user_cache[email]
+            return None
+        return entry[1]
+
+
+def invalidate_user_cache(email: Optional[str] = None) -> None:
+    """
+    Retire un utilisateur (ou tous si email est None) du cache des utilisateurs authentifiés.
+
+    Args:
+        email (str, optional): Email de l'utilisateur modifié
+
+    Note:
+        À appeler après toute modification d'un utilisateur (droits, mot de passe, suppression)
+    """
+    with _cache_lock:
+        if email is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(email, None)
+
+
+def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db_dependency) -> Users:
     """
     Récupère l'utilisateur actuel à partir du token JWT.
 
@@ -105,15 +212,35 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)], db: db
         - Vérifie la validité du token
         - Vérifie l'existence de l'utilisateur
         - Utilisé comme dépendance pour les routes protégées
+        - Fonction synchrone : FastAPI l'exécute dans son pool de threads,
+          la requête SQL ne bloque donc pas la boucle d'événements
+        - Les tokens déjà vérifiés et les utilisateurs lus depuis moins de USER_CACHE_TTL
+          secondes sont servis depuis la mémoire, sans décodage ni requête SQL
+        - L'utilisateur retourné est une copie détachée de la session, à ne pas modifier
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None :
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-        user = db.query(Users).filter(Users.email == username).first()
-        if user is None : 
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Nom d'utilisateur invalide")
+    with registry.time(stage_seconds, "auth_token"):
+        username = verify_token(token)
+    user = _cached_user(username)
+    if user is not None:
         return user
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    with registry.time(stage_seconds, "auth_db_query"):
+        user = db.query(Users).filter(Users.email == username).first()
+    if user is None : 
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Nom d'utilisateur invalide")
+    user = Users(**user.model_dump())
+    if USER_CACHE_TTL > 0:
+        with _cache_lock:
+            _user_cache[username] = (time.monotonic() + USER_CACHE_TTL, user)
+    return user
+
+
+def require_admin(current_user: Annotated[Users, Depends(get_current_user)]) -> Users:
+    """
+    Dépendance des routes d'administration : l'utilisateur authentifié doit être administrateur.
+
+    Raises:
+        HTTPException: 403 si l'utilisateur n'a pas les droits d'administration.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Droits d'administration requis")
+    return current_user
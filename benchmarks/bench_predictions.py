@@ -0,0 +1,327 @@
+# Banc d'essai de latence et de débit des prédictions
+#
+# Exécution : python -m benchmarks.bench_predictions [--catalog films.ndjson] [--sizes 1 10 100 1000] [--save-baseline]
+#
+# Chaque scénario (catalogue rejoué ou catalogue synthétique de N films) est mesuré :
+#   - en appelant directement le pipeline de use_model, étape par étape
+#   - via POST /predictions, avec un client ASGI dans le même processus (sans réseau ni authentification)
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+# Mesures sans cache de prédictions ni base de données sur disque, sauf configuration explicite
+os.environ.setdefault("PREDICTION_CACHE_SIZE", "0")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+import pandas as pd
+
+from app.dataset import DATASET_PATH
+from app.use_model import WARMUP_MOVIE
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (1, 10, 100, 1000)
+STAGES = ("validate", "data_load", "featurize", "predict", "sort_serialize")
+INPUT_COLUMNS = tuple(WARMUP_MOVIE)     # colonnes attendues dans chaque film
+
+
+def load_catalog(path: str) -> list[dict]:
+    """
+    Lit un catalogue de films en NDJSON (un film par ligne) ou en liste JSON.
+
+    Args:
+        path (str): Fichier du catalogue.
+
+    Returns:
+        list[dict]: Films ayant toutes les colonnes d'entrée du modèle.
+
+    Raises:
+        ValueError: Si le fichier ne contient aucun film exploitable.
+    """
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    try:
+        records = json.loads(content)
+    except json.JSONDecodeError:
+        records = [json.loads(line) for line in content.splitlines() if line.strip()]
+    if isinstance(records, dict):
+        records = [records]
+    movies = [r for r in records if isinstance(r, dict) and all(c in r for c in INPUT_COLUMNS)]
+    if not movies:
+        raise ValueError(f"Aucun film exploitable dans {path} (colonnes attendues : {', '.join(INPUT_COLUMNS)})")
+    return movies
+
+
+def to_records(df: pd.DataFrame) -> list[dict]:
+    """
+    Convertit un DataFrame en dictionnaires sérialisables en JSON (NaN / NaT remplacés par None).
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def synthetic_catalog(size: int, seed: int = 0) -> list[dict]:
+    """
+    Tire (avec remise) size films du jeu de données historique, sans leur fréquentation (valeurs manquantes à None).
+
+    Args:
+        size (int): Nombre de films.
+        seed (int): Graine du tirage, pour des catalogues identiques d'une exécution à l'autre.
+
+    Returns:
+        list[dict]: Films au format attendu par POST /predictions.
+    """
+    history = pd.read_json(DATASET_PATH).drop(columns=["weekly_entrances"])
+    rows = np.random.default_rng(seed).integers(0, len(history), size)
+    return to_records(history.iloc[rows])
+
+
+def percentiles(samples_ms: list[float]) -> dict:
+    values = np.asarray(samples_ms)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Retourne le pic de mémoire résidente du processus (Mo).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024   # octets sous macOS, Ko sous Linux
+
+
+@contextmanager
+def timed(timings: dict, stage: str):
+    start = time.perf_counter()
+    yield
+    timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+
+
+def bench_startup() -> dict:
+    """
+    Mesure le chargement des tables de niveaux et du modèle (préchauffage compris).
+
+    Returns:
+        dict: Durées en millisecondes.
+    """
+    from app.feature_store import load_feature_store
+    from app.model_registry import model_registry
+    from app.use_model import warm_up
+
+    timings = {}
+    with timed(timings, "feature_store_load"):
+        load_feature_store()
+    with timed(timings, "model_load"):
+        model_registry.load(warm_up=warm_up)
+    return {stage: values[0] for stage, values in timings.items()}
+
+
+def bench_direct(movies: list[dict], repeat: int) -> dict:
+    """
+    Rejoue le calcul de POST /predictions étape par étape (validate_movies, predict_movies puis top_predictions).
+
+    Args:
+        movies (list[dict]): Catalogue à prédire.
+        repeat (int): Nombre d'exécutions mesurées (après une exécution de chauffe).
+
+    Returns:
+        dict: Percentiles de latence (ms), débit (films/s) et durée médiane de chaque étape (ms).
+    """
+    from app.feature_builder import frame_from_movies
+    from app.model_registry import model_registry
+    from app.schemas import validate_movies
+    from app.serialization import dumps
+    from app.use_model import build_features, top_predictions
+
+    timings: dict[str, list[float]] = {}
+    for i in range(repeat + 1):
+        run: dict[str, list[float]] = {}
+        with timed(run, "validate"):
+            validated, valid, _ = validate_movies(movies)
+        with timed(run, "data_load"):
+            df = frame_from_movies(validated)
+        with timed(run, "featurize"):
+            data = build_features(df)
+        with timed(run, "predict"):
+            predictions = np.round(model_registry.model.predict(data), 0)
+        with timed(run, "sort_serialize"):
+            dumps({"result": top_predictions([movies[i] for i in valid], predictions)})
+        if i == 0:
+            continue    # chauffe
+        for stage, values in run.items():
+            timings.setdefault(stage, []).extend(values)
+        timings.setdefault("total", []).append(sum(values[0] for values in run.values()))
+    total_s = sum(timings["total"]) / 1000
+    return {
+        "latency_ms": percentiles(timings["total"]),
+        "rows_per_s": len(movies) * repeat / total_s,
+        "stages_ms": {stage: float(np.median(timings[stage])) for stage in STAGES},
+    }
+
+
+async def bench_asgi(movies: list[dict], repeat: int, concurrency: int) -> dict:
+    """
+    Envoie le catalogue à POST /predictions via httpx.ASGITransport.
+
+    Args:
+        movies (list[dict]): Catalogue envoyé dans chaque requête.
+        repeat (int): Nombre de requêtes mesurées.
+        concurrency (int): Requêtes simultanées (regroupées par le micro-batcher).
+
+    Returns:
+        dict: Percentiles de latence (ms) et débit (films/s).
+
+    Note:
+        Le lifespan de l'application est exécuté explicitement (ASGITransport ne le déclenche pas)
+        et l'authentification est remplacée par un utilisateur fictif.
+    """
+    import httpx
+    from app.main import app
+    from app.modeles import Users
+    from app.utils import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: Users(id=0, username="bench", email="bench@example.com",
+                                                               hashed_password="", is_admin=False)
+    body = json.dumps(movies).encode()     # encodé une fois, comme un client qui renvoie le même catalogue
+    headers = {"Content-Type": "application/json"}
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+            async def send(measure: bool) -> None:
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post("/predictions", content=body, headers=headers)
+                    response.raise_for_status()
+                    if measure:
+                        latencies.append((time.perf_counter() - start) * 1000)
+
+            await send(measure=False)   # chauffe
+            start = time.perf_counter()
+            await asyncio.gather(*(send(measure=True) for _ in range(repeat)))
+            elapsed = time.perf_counter() - start
+    app.dependency_overrides.pop(get_current_user, None)
+    return {
+        "latency_ms": percentiles(latencies),
+        "rows_per_s": len(movies) * repeat / elapsed,
+    }
+
+
+def run_benchmarks(catalogs: dict[str, list[dict]], repeat: int, concurrency: int) -> dict:
+    """
+    Mesure chaque catalogue par les deux chemins et rassemble les résultats.
+
+    Returns:
+        dict: Environnement, durées de démarrage, résultats par scénario et pic de mémoire.
+    """
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "concurrency": concurrency,
+        },
+        "startup_ms": bench_startup(),
+        "scenarios": {},
+    }
+    for name, movies in catalogs.items():
+        results["scenarios"][name] = {
+            "rows": len(movies),
+            "direct": bench_direct(movies, repeat),
+            "asgi": asyncio.run(bench_asgi(movies, repeat, concurrency)),
+        }
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compare les résultats à la référence enregistrée.
+
+    Args:
+        results (dict): Résultats de run_benchmarks.
+        baseline (dict): Résultats de référence (baseline.json).
+        tolerance (float): Dégradation relative acceptée (0.2 = 20 %).
+
+    Returns:
+        list[str]: Régressions détectées (p50 ou p95 plus lent au-delà de la tolérance).
+
+    Note:
+        Le débit n'est pas comparé : calculé sur la durée totale, il est plus sensible
+        aux pauses ponctuelles de la machine que les percentiles.
+    """
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for path in ("direct", "asgi"):
+            for percentile in ("p50", "p95"):
+                value, ref_value = scenario[path]["latency_ms"][percentile], reference[path]["latency_ms"][percentile]
+                if value > ref_value * (1 + tolerance):
+                    regressions.append(f"{name} / {path} : {percentile} {value:.1f} ms (référence {ref_value:.1f} ms)")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    startup = ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in results["startup_ms"].items())
+    print(f"Démarrage : {startup}")
+    print(f"{'scénario':<16}{'chemin':<8}{'films':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'films/s':>11}")
+    for name, scenario in results["scenarios"].items():
+        for path in ("direct", "asgi"):
+            r = scenario[path]
+            latency = r["latency_ms"]
+            print(f"{name:<16}{path:<8}{scenario['rows']:>7}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+                  f"{latency['p99']:>10.2f}{r['rows_per_s']:>11.0f}")
+        stages = ", ".join(f"{stage} {ms:.2f}" for stage, ms in scenario["direct"]["stages_ms"].items())
+        print(f"{'':<16}étapes (ms, médiane) : {stages}")
+    print(f"Pic de mémoire résidente : {results['peak_rss_mb']:.0f} Mo")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mesure la latence et le débit des prédictions")
+    parser.add_argument("--catalog", action="append", default=[], help="catalogue NDJSON ou JSON à rejouer (répétable)")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), help="tailles des catalogues synthétiques")
+    parser.add_argument("--repeat", type=int, default=50, help="exécutions mesurées par scénario")
+    parser.add_argument("--concurrency", type=int, default=1, help="requêtes simultanées sur POST /predictions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichier de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistrer les résultats comme nouvelle référence")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="dégradation relative tolérée avant d'échouer")
+    parser.add_argument("--output", help="écrire aussi les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    catalogs = {os.path.basename(path): load_catalog(path) for path in args.catalog}
+    catalogs.update({f"synthetic-{size}": synthetic_catalog(size, args.seed) for size in args.sizes})
+    results = run_benchmarks(catalogs, args.repeat, args.concurrency)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Référence enregistrée dans {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("⚠️ Régressions par rapport à la référence :")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("✅ Aucune régression par rapport à la référence")
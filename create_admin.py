@@ -1,14 +1,8 @@
-from sqlmodel import Session
+from sqlmodel import Session, select
 from app.utils import bcrypt_context
-from sqlmodel import SQLModel
-from app.database import engine
+from app.database import engine, init_db
 from app.modeles import Users
 import os
-from dotenv import load_dotenv, find_dotenv, set_key
-
-
-dot_env_path = find_dotenv()
-load_dotenv(dotenv_path=dot_env_path, override=True)
 
 API_USER = os.getenv("API_USER", None)
 API_EMAIL = os.getenv("API_EMAIL", None)
@@ -16,9 +10,25 @@ API_PASSWORD = os.getenv("API_PASSWORD", None)
 
 
 def populate_db():
+    """
+    Ajoute l'utilisateur admin décrit dans le .env, s'il n'existe pas encore.
+
+    Note:
+        Peut être relancé à chaque démarrage du conteneur sans erreur d'unicité.
+    """
+    if not (API_USER and API_EMAIL and API_PASSWORD):
+        print("⚠️ API_USER, API_EMAIL ou API_PASSWORD absent du .env : aucun admin créé")
+        return
 
     with Session(engine) as session:
-        
+
+        existing = session.exec(
+            select(Users).where((Users.username == API_USER) | (Users.email == API_EMAIL))
+        ).first()
+        if existing is not None:
+            print("✅ Utilisateur admin déjà présent")
+            return
+
         # Ajouter un utilisateur admin
         admin_user = Users(
             username=API_USER,
@@ -31,5 +41,5 @@ def populate_db():
     
 if __name__ == "__main__" :
     
-    SQLModel.metadata.create_all(engine)
+    init_db()
     populate_db()
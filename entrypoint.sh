@@ -1,8 +1,17 @@
 #!/bin/bash
 # startup.sh
 
-# Exécuter le script de création d'admin
-python create_admin.py
+# SERVE_MODE=prefork (défaut) : gunicorn, un worker uvicorn par cœur alloué (WEB_CONCURRENCY)
+# SERVE_MODE=single : un seul processus uvicorn
+SERVE_MODE=${SERVE_MODE:-prefork}
 
-# Démarrer l'application principale
-exec uvicorn app.main:app --host=0.0.0.0 --port=8086
+if [ "$SERVE_MODE" = "single" ]; then
+    # Exécuter le script de création d'admin
+    python create_admin.py
+
+    # Démarrer l'application principale
+    exec uvicorn app.main:app --host=0.0.0.0 --port=8086
+fi
+
+# L'admin est créé par le processus parent de gunicorn (gunicorn.conf.py)
+exec gunicorn -c gunicorn.conf.py app.main:app
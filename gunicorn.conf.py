@@ -0,0 +1,64 @@
+# Configuration gunicorn du mode pré-forké : gunicorn -c gunicorn.conf.py app.main:app
+#
+# Le processus parent importe l'application, crée l'admin et charge le modèle et les tables
+# de niveaux avant de forker : les workers uvicorn partagent ces pages en copie sur écriture.
+import gc
+import math
+import os
+
+
+def available_cpus() -> int:
+    """
+    Cœurs réellement utilisables : affinité du processus, bornée par le quota CPU du conteneur (cgroup v2 ou v1).
+
+    Note:
+        Dans un conteneur, le nombre de cœurs de l'hôte peut être bien supérieur au quota :
+        un worker (et un modèle chargé) par cœur de l'hôte épuiserait la mémoire.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:      # cgroup v2 : "<quota> <période>" ou "max <période>"
+            limit, period = f.read().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f, open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as g:
+                limit, period = int(f.read()), int(g.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8086)}"
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", available_cpus()))   # un worker par cœur alloué au conteneur par défaut
+preload_app = True      # application importée une seule fois, dans le parent
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))           # recyclage des workers (fuites mémoire)
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))  # évite de recycler tous les workers en même temps
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))      # délai pour terminer les requêtes en cours
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+accesslog = "-"
+
+
+def on_starting(server):
+    """
+    Prépare, une seule fois et avant le premier fork, les ressources partagées par les workers.
+    """
+    from create_admin import populate_db
+    from app.database import engine
+    from app.main import preload
+
+    preload()           # tables, niveaux des talents, modèle préchauffé
+    populate_db()       # admin créé par le parent : pas de concurrence entre workers
+    engine.dispose()    # pas de connexion ouverte héritée par les workers
+    gc.collect()
+    gc.freeze()         # objets chargés exclus du ramasse-miettes : leurs pages restent partagées
@@ -0,0 +1,24 @@
+import asyncio
+import io
+
+import orjson
+
+from app import batch
+from app.batch import stream_predictions
+from app.use_model import WARMUP_MOVIE
+
+
+def test_stream_ends_with_error_line_on_unexpected_failure(monkeypatch):
+    async def failing_run(fn, *args, reject=True):
+        raise RuntimeError("pool de processus cassé")
+
+    monkeypatch.setattr(batch.inference_executor, "run", failing_run)
+    catalog = io.BytesIO(orjson.dumps(WARMUP_MOVIE) + b"\n")
+
+    async def collect():
+        return [line async for line in stream_predictions(catalog, chunk_size=10)]
+
+    lines = asyncio.run(collect())
+
+    assert orjson.loads(lines[-1]) == {"error": "Erreur interne : RuntimeError"}
+    assert catalog.closed
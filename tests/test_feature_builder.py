@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from app.dataset import DATASET_PATH
+from app.feature_builder import EXTRA_FEATURES, FEATURES_OF_INTEREST, FeatureBuilder, TALENT_FLAGS
+from app.feature_store import build_feature_store
+
+
+EDGE_DATES = [
+    "20/06/2019", "21/06/2019", "21/09/2019", "22/09/2019", "20/12/2019", "21/12/2019",
+    "19/03/2019", "20/03/2019", "21/03/2019", "10/03/2019", "11/03/2019", "05/01/2019", "06/01/2019",
+    "09/09/2019", "10/09/2019", "01/07/2019", "30/06/2019", "29/02/2020",
+    "16/03/2020", "17/03/2020", "11/05/2020", "12/05/2020", "30/10/2020", "15/12/2020", "03/04/2021", "03/05/2021",
+    "14/09/2014", "15/09/2014", "31/02/2020", "2020-03-17", "",
+]
+
+
+def reference_features(history: pd.DataFrame, movies: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcul d'origine (use_model avant vectorisation), ligne par ligne.
+    """
+    df = movies.copy()
+    for column, flag in TALENT_FLAGS.items():
+        means = history.groupby(column)['weekly_entrances'].mean()
+        top = set(means[means > 500000].index)
+        mid = set(means[(means < 500001) & (means > 250000)].index)
+        df[flag] = df[column].apply(lambda x: 1 if x in top else 0)
+        df[f"{flag}_mid"] = df[column].apply(lambda x: 1 if x in mid else 0)
+    df['top_pays'] = df.country.apply(lambda x: 1 if x in (['France', 'Etats-Unis', 'Grande-Bretagne']) else 0)
+    date = pd.to_datetime(df['released_date'], format="%d/%m/%Y", errors='coerce')
+    df["summer"] = date.apply(lambda x: 1 if ((x.month == 6 and x.day >= 21) or x.month in [7, 8] or (x.month == 9 and x.day < 22)) else 0)
+    df["automn"] = date.apply(lambda x: 1 if ((x.month == 9 and x.day >= 22) or x.month in [10, 11] or (x.month == 12 and x.day < 21)) else 0)
+    df["winter"] = date.apply(lambda x: 1 if ((x.month == 12 and x.day >= 21) or x.month in [1, 2] or (x.month == 3 and x.day < 20)) else 0)
+    df["spring"] = date.apply(lambda x: 1 if ((x.month == 3 and x.day >= 21) or x.month in [4, 5] or (x.month == 6 and x.day < 21)) else 0)
+    df["is_covid"] = date.apply(lambda x: 1 if (
+        (x >= pd.to_datetime("2020-03-17") and x <= pd.to_datetime("2020-05-11")) or
+        (x >= pd.to_datetime("2020-10-30") and x <= pd.to_datetime("2020-12-15")) or
+        (x >= pd.to_datetime("2021-04-03") and x <= pd.to_datetime("2021-05-03"))
+    ) else 0)
+    df["post_streaming"] = date.apply(lambda x: 1 if x >= pd.to_datetime("2014-09-15") else 0)
+    df["summer_holidays"] = date.apply(lambda x: 1 if x.month >= 7 or (x.month <= 9 and x.day < 10) else 0)
+    df["christmas_period"] = date.apply(lambda x: 1 if (x.month == 12 and x.day >= 20) or (x.month == 1 and x.day <= 5) else 0)
+    df["is_award_season"] = date.apply(lambda x: 1 if (x.month == 2 or (x.month == 3 and x.day <= 10)) else 0)
+    return df
+
+
+@pytest.fixture(scope="module")
+def history():
+    return pd.read_json(DATASET_PATH, dtype={"released_date": str})
+
+
+@pytest.fixture(scope="module")
+def builder():
+    return FeatureBuilder(build_feature_store(DATASET_PATH))
+
+
+@pytest.fixture(scope="module")
+def movies(history):
+    sample = history.sample(2000, random_state=0)
+    sample = sample.assign(released_date=sample["released_date"].str.strip())   # dates telles qu'envoyées à l'API
+    edge = history.sample(len(EDGE_DATES), random_state=1).assign(released_date=EDGE_DATES)
+    return pd.concat([sample, edge], ignore_index=True).drop(columns=["weekly_entrances"])
+
+
+@pytest.mark.parametrize("parsed", [False, True], ids=["texte", "datetime64"])
+def test_transform_matches_original_implementation(builder, history, movies, parsed):
+    columns = FEATURES_OF_INTEREST + EXTRA_FEATURES
+    expected = reference_features(history, movies)[columns]
+    if parsed:      # dates déjà converties, comme par frame_from_movies
+        movies = movies.assign(released_date=pd.to_datetime(movies["released_date"], format="%d/%m/%Y", errors="coerce"))
+
+    result = builder.transform(movies, columns)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_extra_features_are_only_returned_on_request(builder, movies):
+    assert list(builder.transform(movies.head(5)).columns) == FEATURES_OF_INTEREST
+
+
+def test_surrounding_spaces_in_dates_are_ignored(builder, movies):
+    padded = movies.head(20).assign(released_date="  " + movies["released_date"].head(20) + " ")
+
+    pd.testing.assert_frame_equal(builder.transform(padded), builder.transform(movies.head(20)))
@@ -0,0 +1,66 @@
+import json
+
+import pandas as pd
+import pytest
+
+from app import feature_store
+from app.dataset import DATASET_PATH, TALENT_COLUMNS
+from app.feature_store import build_feature_store, refresh_from_log, tier_changes
+
+
+@pytest.fixture(scope="module")
+def history():
+    return pd.read_json(DATASET_PATH, dtype={"released_date": str})
+
+
+def new_results(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Résultats ajoutés : films existants (noms reclassés vers le haut ou le bas) et nouveaux noms.
+    """
+    rows = history.sample(300, random_state=0).reset_index(drop=True)
+    rows.loc[:99, "weekly_entrances"] = rows.loc[:99, "weekly_entrances"] // 10
+    rows.loc[100:199, "weekly_entrances"] = rows.loc[100:199, "weekly_entrances"] * 30
+    rows.loc[200:, "actor_1"] = [f"Nouveau talent {i % 40}" for i in range(200, len(rows))]
+    rows.loc[200:, "weekly_entrances"] = [250000 + 5000 * (i % 80) for i in range(200, len(rows))]
+    rows.loc[250:259, "writer"] = None
+    return rows
+
+
+def test_log_replay_matches_full_rebuild(history, tmp_path, monkeypatch):
+    base = build_feature_store(DATASET_PATH)
+    log = tmp_path / "box_office_log.ndjson"
+    monkeypatch.setattr(feature_store, "TALENT_LOG_PATH", str(log))
+    monkeypatch.setattr(feature_store, "_store", base)
+    added = new_results(history)
+
+    columns = ["weekly_entrances", *TALENT_COLUMNS]
+    for step in (added[:120], added[120:121], added[121:]):     # ajouts successifs, relus à chaque fois
+        with open(log, "a", encoding="utf-8") as f:
+            for record in step[columns].to_dict(orient="records"):
+                f.write(json.dumps({**record, "base": base.version}, ensure_ascii=False) + "\n")
+        assert refresh_from_log()
+    assert not refresh_from_log()       # rien de nouveau : simple os.stat
+    replayed = feature_store.get_feature_store()
+    assert tier_changes(base, replayed)     # des noms ont bien changé de niveau
+
+    combined = tmp_path / "DATASET_FINAL.json"
+    pd.concat([history, added], ignore_index=True).to_json(combined, orient="records", force_ascii=False)
+    rebuilt = build_feature_store(str(combined), artifact_dir=str(tmp_path / "artifact"))
+
+    for column in TALENT_COLUMNS:
+        assert replayed[column].top == rebuilt[column].top, column
+        assert replayed[column].mid == rebuilt[column].mid, column
+        assert dict(replayed[column].counts) == dict(rebuilt[column].counts), column
+        assert dict(replayed[column].sums) == dict(rebuilt[column].sums), column
+        assert dict(replayed[column].means) == pytest.approx(dict(rebuilt[column].means)), column
+
+
+def test_results_for_another_dataset_version_are_ignored(tmp_path, monkeypatch):
+    base = build_feature_store(DATASET_PATH)
+    log = tmp_path / "box_office_log.ndjson"
+    log.write_text(json.dumps({"base": "autre", "weekly_entrances": 10 ** 9, "actor_1": "Inconnu"}) + "\n")
+    monkeypatch.setattr(feature_store, "TALENT_LOG_PATH", str(log))
+    monkeypatch.setattr(feature_store, "_store", base)
+
+    assert refresh_from_log()
+    assert "Inconnu" not in feature_store.get_feature_store()["actor_1"].means
@@ -0,0 +1,66 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import jobs
+from app.jobs import JobRunner
+from app.modeles import ScoringJobs
+from app.use_model import WARMUP_MOVIE
+
+
+def test_runner_loop_survives_a_failed_claim(monkeypatch):
+    claims = []
+
+    def claim_next_job():
+        claims.append(len(claims))
+        if len(claims) == 1:
+            raise RuntimeError("base indisponible")
+        return None
+
+    monkeypatch.setattr(jobs, "claim_next_job", claim_next_job)
+
+    async def scenario():
+        runner = JobRunner(executor=None, slots=1, poll_interval=0.01)
+        task = asyncio.create_task(runner._loop())
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert len(claims) > 1
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine, tables=[ScoringJobs.__table__])
+    monkeypatch.setattr(jobs, "engine", engine)
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path))
+    return engine
+
+
+def test_reclaimed_job_is_abandoned_by_its_previous_runner(jobs_db, monkeypatch):
+    now = datetime.now(timezone.utc)
+    with Session(jobs_db) as session:
+        session.add(ScoringJobs(id="job", status="pending", chunk_size=1, total=2, created_at=now, updated_at=now))
+        session.commit()
+    with open(jobs.input_path("job"), "wb") as f:
+        f.write(orjson.dumps(WARMUP_MOVIE) + b"\n" + orjson.dumps(WARMUP_MOVIE) + b"\n")
+
+    first = jobs.claim_next_job()
+    monkeypatch.setattr(jobs, "JOB_STALE_AFTER", -1)    # la réservation expire aussitôt
+    second = jobs.claim_next_job()
+    assert first[0] == second[0] == "job" and first[1] != second[1]
+
+    jobs.run_job(*first)
+    assert not os.path.exists(jobs.result_path("job"))
+    assert jobs.get_job("job").status == "running"
+
+    jobs.run_job(*second)
+    job = jobs.get_job("job")
+    assert (job.status, job.processed) == ("done", 2)
+    assert sorted(os.listdir(jobs.JOBS_DIR)) == ["job.ndjson.gz", "jobs.db"]
@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+import shutil
+
+import pytest
+
+from app import model_registry as registry_module
+from app.model_registry import ModelRegistry, PICKLE_MODEL_PATH
+from app.native_model import export_native_model, manifest_path
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    pkl = str(tmp_path / "catboostmodel.pkl")
+    cbm = str(tmp_path / "catboostmodel.cbm")
+    shutil.copy(PICKLE_MODEL_PATH, pkl)
+    monkeypatch.setattr(registry_module, "PICKLE_MODEL_PATH", pkl)
+    monkeypatch.setattr(registry_module, "NATIVE_MODEL_PATH", cbm)
+    return pkl, cbm
+
+
+def _touch(path, delta):
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + delta))
+
+
+def test_new_manifest_alone_is_reloaded(model_dir):
+    _, cbm = model_dir
+    export_native_model(model_dir[0], cbm)
+    registry = ModelRegistry(cbm)
+    before = registry.current.version
+
+    with open(manifest_path(cbm), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(manifest_path(cbm), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)      # même contenu, autre mise en forme : nouvelle empreinte
+    _touch(manifest_path(cbm), 10)
+
+    assert registry.reload_if_changed()
+    assert registry.current.version != before
+
+
+def test_export_is_picked_up_and_newer_pickle_is_reported(model_dir, caplog):
+    pkl, cbm = model_dir
+    registry = ModelRegistry(None)
+    assert registry.current.path == pkl
+
+    export_native_model(pkl, cbm)
+    assert registry.reload_if_changed()
+    assert registry.current.path == cbm
+
+    _touch(pkl, 10)
+    with caplog.at_level(logging.WARNING, logger="app.model_registry"):
+        assert not registry.reload_if_changed()
+        registry.reload_if_changed()
+    assert len([r for r in caplog.records if "python -m app.native_model" in r.getMessage()]) == 1
@@ -0,0 +1,60 @@
+import pytest
+from fastapi import HTTPException
+
+from app import rate_limit
+from app.rate_limit import FailureLimiter, LoginRateLimiter
+
+
+def test_purge_beyond_10000_keys_drops_stale_keys(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = FailureLimiter(max_failures=3, window=60)
+    for i in range(10000):
+        limiter.record_failure(f"old-{i}")
+    now[0] += 120   # tous les échecs précédents ont expiré
+
+    limiter.record_failure("attacker")
+
+    assert list(limiter._failures) == ["attacker"]
+
+
+def test_ip_limit_applies_when_usernames_rotate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = LoginRateLimiter(max_failures_per_user=5, max_failures_per_ip=20, window=60)
+    for i in range(10001):
+        limiter.record_failure(f"victim-{i}", f"10.0.{i // 256}.{i % 256}")
+    now[0] += 120
+
+    for i in range(20):
+        limiter.record_failure(f"user-{i}@example.com", "203.0.113.7")
+
+    with pytest.raises(HTTPException) as e:
+        limiter.check("someone-else@example.com", "203.0.113.7")
+    assert e.value.status_code == 429
+
+
+def test_tracked_keys_are_capped_in_lru_order(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = FailureLimiter(max_failures=2, window=60, max_keys=3)
+    for key in ("a", "b", "c"):
+        limiter.record_failure(key)
+        now[0] += 1
+    limiter.record_failure("a")     # "a" redevient la plus récente
+
+    limiter.record_failure("d")
+
+    assert list(limiter._failures) == ["c", "a", "d"]
+
+
+def test_failures_per_key_are_bounded_and_still_block(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = FailureLimiter(max_failures=3, window=60)
+    for _ in range(50):
+        limiter.record_failure("victim")
+        now[0] += 1
+
+    assert len(limiter._failures["victim"]) == 3
+    assert limiter.retry_after("victim") == 1047.0 + 60 - now[0]
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import HTTPException
+
+from app.startup import require_ready, startup_state
+
+
+def test_require_ready_rejects_until_loaded(monkeypatch):
+    monkeypatch.setattr(startup_state, "ready", False)
+    with pytest.raises(HTTPException) as e:
+        require_ready()
+    assert e.value.status_code == 503
+    assert "Retry-After" in e.value.headers
+
+    monkeypatch.setattr(startup_state, "ready", True)
+    require_ready()
+
+
+def test_cli_reports_every_loading_phase():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    completed = subprocess.run(
+        [sys.executable, "-m", "app.startup", "--json", "--top", "3"],
+        cwd=root, env=env, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    phases = json.loads(completed.stdout)["phases_ms"]
+    assert {"import app.main", "init_db", "import_pipeline", "feature_store", "model"} <= set(phases)